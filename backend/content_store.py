@@ -0,0 +1,311 @@
+"""
+Contenu des modules de cours : index de métadonnées en mémoire, leçons sur disque chargées à la demande
+"""
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content', 'modules')
+LESSON_CACHE_SIZE = int(os.environ.get('CYBERFORGE_LESSON_CACHE_SIZE', 64))
+
+MODULE_FIELDS = ('id', 'title', 'description', 'icon', 'difficulty', 'duration')
+# Champs de l'index propres au stockage, absents des réponses complètes
+LESSON_INDEX_FIELDS = ('file', 'size', 'words')
+WORDS_PER_MINUTE = 200
+_SAFE_NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def _write_atomic(path, text):
+    """Écrire un fichier sans jamais laisser de version partielle visible.
+
+    Le fichier temporaire a un nom unique : deux processus qui écrivent le
+    même fichier ne partagent pas de brouillon.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f'{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def _reading_time(words):
+    """Temps de lecture estimé en minutes (au moins 1)"""
+    return max(1, math.ceil(words / WORDS_PER_MINUTE))
+
+
+def _validate_lessons(lessons):
+    """ValueError si `lessons` n'est pas une liste de leçons {id, title, content, ...} d'identifiants distincts"""
+    if not isinstance(lessons, list):
+        raise ValueError("lessons must be a list")
+    ids, files = set(), set()
+    for position, lesson in enumerate(lessons):
+        if not isinstance(lesson, dict):
+            raise ValueError("Each lesson must be an object")
+        if not isinstance(lesson.get('content') or '', str):
+            raise ValueError("Lesson content must be a string")
+        # 1 et "1" donneraient le même fichier : la seconde écraserait la première sur disque
+        lesson_id = lesson.get('id')
+        filename = _lesson_filename(position, lesson)
+        if (lesson_id is not None and str(lesson_id) in ids) or filename in files:
+            raise ValueError(f"Duplicate lesson id: {lesson_id}")
+        if lesson_id is not None:
+            ids.add(str(lesson_id))
+        files.add(filename)
+
+
+def _lesson_filename(position, lesson):
+    lesson_id = str(lesson.get('id', ''))
+    if _SAFE_NAME.match(lesson_id):
+        return f"{lesson_id}.md"
+    return f"lesson_{position + 1}.md"
+
+
+class ModuleStore:
+    """Modules de cours stockés dans `root` (index.json + un fichier .md par leçon).
+
+    Seul l'index (titres, descriptions, liste des leçons) est lu au démarrage.
+    Le texte des leçons est lu au premier accès puis gardé dans un cache LRU
+    borné à `cache_size` leçons. Les modifications admin sont écrites sur disque.
+    """
+
+    def __init__(self, root=CONTENT_DIR, cache_size=LESSON_CACHE_SIZE):
+        self.root = root
+        self.cache_size = cache_size
+        self._lock = threading.RLock()
+        self._modules = OrderedDict()  # module_id -> métadonnées (leçons sans contenu)
+        self._versions = {}            # module_id -> version, incrémentée à chaque écriture
+        self._version = 0              # version de l'ensemble des modules
+        self._lessons = OrderedDict()  # (module_id, version, fichier) -> contenu
+        self._hits = 0
+        self._misses = 0
+        self._load_index()
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.root, 'index.json')
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, 'r', encoding='utf-8') as f:
+            for module in json.load(f)['modules']:
+                self._modules[module['id']] = module
+                self._versions[module['id']] = 0
+        print(f"📚 [CONTENT] {len(self._modules)} modules indexés")
+
+    def _save_index(self):
+        """Réécrire index.json (appelé avec le verrou)"""
+        data = json.dumps({"modules": list(self._modules.values())}, ensure_ascii=False, indent=2)
+        _write_atomic(self._index_path, data + '\n')
+
+    def __contains__(self, module_id):
+        return module_id in self._modules
+
+    def __len__(self):
+        return len(self._modules)
+
+    @property
+    def version(self):
+        """Incrémentée à chaque création, modification ou suppression de module"""
+        return self._version
+
+    def module_version(self, module_id):
+        """Version du contenu d'un module (None s'il n'existe pas)"""
+        return self._versions.get(module_id)
+
+    def list_modules(self):
+        """Métadonnées de tous les modules, sans les leçons"""
+        with self._lock:
+            return [{field: module.get(field) for field in MODULE_FIELDS} for module in self._modules.values()]
+
+    def meta(self, module_id):
+        """Métadonnées d'un module (dict vide s'il n'existe pas)"""
+        module = self._modules.get(module_id)
+        if module is None:
+            return {}
+        return {field: module.get(field) for field in MODULE_FIELDS}
+
+    def _lesson_content(self, module_id, version, filename):
+        key = (module_id, version, filename)
+        with self._lock:
+            content = self._lessons.get(key)
+            if content is not None:
+                self._lessons.move_to_end(key)
+                self._hits += 1
+                return content
+            self._misses += 1
+
+        path = os.path.join(self.root, module_id, filename)
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                content = f.read()
+        except FileNotFoundError:
+            content = ''
+
+        with self._lock:
+            # Une écriture a pu changer la version entre-temps : la clé porte l'ancienne
+            self._lessons[key] = content
+            self._lessons.move_to_end(key)
+            while len(self._lessons) > self.cache_size:
+                self._lessons.popitem(last=False)
+        return content
+
+    def get(self, module_id):
+        """Module complet avec le contenu de ses leçons, ou None"""
+        with self._lock:
+            module = self._modules.get(module_id)
+            version = self._versions.get(module_id)
+        if module is None:
+            return None
+        lessons = []
+        for lesson in module.get('lessons', []):
+            full = {k: v for k, v in lesson.items() if k not in LESSON_INDEX_FIELDS}
+            full['content'] = self._lesson_content(module_id, version, lesson['file'])
+            lessons.append(full)
+        return {**{field: module.get(field) for field in MODULE_FIELDS}, "lessons": lessons}
+
+    def _lesson_summary(self, module_id, version, lesson):
+        """Identifiant, titre, taille et temps de lecture d'une leçon, sans son contenu"""
+        size, words = lesson.get('size'), lesson.get('words')
+        if size is None or words is None:
+            # Index écrit à la main : mesurer le fichier
+            content = self._lesson_content(module_id, version, lesson['file'])
+            size, words = len(content.encode('utf-8')), len(content.split())
+        return {
+            "id": lesson.get('id'),
+            "title": lesson.get('title'),
+            "size": size,
+            "words": words,
+            "reading_time_min": _reading_time(words)
+        }
+
+    def outline(self, module_id):
+        """Module avec la liste de ses leçons, sans le texte des leçons (servi depuis l'index)"""
+        with self._lock:
+            module = self._modules.get(module_id)
+            version = self._versions.get(module_id)
+        if module is None:
+            return None
+        lessons = [self._lesson_summary(module_id, version, lesson) for lesson in module.get('lessons', [])]
+        return {
+            **{field: module.get(field) for field in MODULE_FIELDS},
+            "lessons": lessons,
+            "reading_time_min": sum(lesson["reading_time_min"] for lesson in lessons)
+        }
+
+    def lesson(self, module_id, lesson_id):
+        """Une leçon avec son contenu et ses voisines, ou None"""
+        with self._lock:
+            module = self._modules.get(module_id)
+            version = self._versions.get(module_id)
+        if module is None:
+            return None
+        lessons = module.get('lessons', [])
+        for position, lesson in enumerate(lessons):
+            if str(lesson.get('id')) != str(lesson_id):
+                continue
+            full = {k: v for k, v in lesson.items() if k not in LESSON_INDEX_FIELDS}
+            full.update(self._lesson_summary(module_id, version, lesson))
+            full['content'] = self._lesson_content(module_id, version, lesson['file'])
+            full['module_id'] = module_id
+            full['position'] = position + 1
+            full['total'] = len(lessons)
+            full['previous_id'] = lessons[position - 1].get('id') if position > 0 else None
+            full['next_id'] = lessons[position + 1].get('id') if position + 1 < len(lessons) else None
+            return full
+        return None
+
+    def _write_module(self, module_id, fields, lessons):
+        """Écrire les leçons puis l'index (appelé avec le verrou)"""
+        module_dir = os.path.join(self.root, module_id)
+        os.makedirs(module_dir, exist_ok=True)
+
+        lesson_index = []
+        if lessons is None:
+            lesson_index = self._modules[module_id].get('lessons', [])
+        else:
+            for position, lesson in enumerate(lessons):
+                filename = _lesson_filename(position, lesson)
+                content = lesson.get('content') or ''
+                _write_atomic(os.path.join(module_dir, filename), content)
+                entry = {k: v for k, v in lesson.items() if k != 'content' and k not in LESSON_INDEX_FIELDS}
+                entry.update(file=filename, size=len(content.encode('utf-8')), words=len(content.split()))
+                lesson_index.append(entry)
+            # Supprimer les fichiers des leçons retirées
+            kept = {entry['file'] for entry in lesson_index}
+            for name in os.listdir(module_dir):
+                if name.endswith('.md') and name not in kept:
+                    os.remove(os.path.join(module_dir, name))
+
+        self._modules[module_id] = {**fields, "lessons": lesson_index}
+        # Version tirée du compteur global : jamais réutilisée, même après suppression
+        self._version += 1
+        self._versions[module_id] = self._version
+        self._save_index()
+
+    def create(self, module):
+        """Ajouter un module ; ValueError si l'identifiant est invalide, False s'il existe déjà"""
+        module_id = module.get('id')
+        if not isinstance(module_id, str) or not _SAFE_NAME.match(module_id):
+            raise ValueError("Invalid module id")
+        with self._lock:
+            if module_id in self._modules:
+                return False
+            fields = {field: module.get(field) for field in MODULE_FIELDS}
+            lessons = module.get('lessons') or []
+            _validate_lessons(lessons)
+            self._write_module(module_id, fields, lessons)
+        return True
+
+    def update(self, module_id, changes):
+        """Modifier les champs fournis ; les leçons ne sont réécrites que si fournies.
+
+        Une liste de leçons fournie remplace toutes les leçons (les fichiers des
+        leçons absentes sont supprimés) ; ValueError si elle est mal formée.
+        """
+        if changes.get('lessons') is not None:
+            _validate_lessons(changes['lessons'])
+        with self._lock:
+            current = self._modules.get(module_id)
+            if current is None:
+                return False
+            fields = {field: changes.get(field, current.get(field)) for field in MODULE_FIELDS}
+            fields['id'] = module_id
+            self._write_module(module_id, fields, changes.get('lessons'))
+        return True
+
+    def delete(self, module_id):
+        """Supprimer un module et ses fichiers"""
+        with self._lock:
+            if module_id not in self._modules:
+                return False
+            del self._modules[module_id]
+            del self._versions[module_id]
+            self._version += 1
+            self._save_index()
+            module_dir = os.path.join(self.root, module_id)
+            if os.path.isdir(module_dir):
+                for name in os.listdir(module_dir):
+                    os.remove(os.path.join(module_dir, name))
+                os.rmdir(module_dir)
+        return True
+
+    def stats(self):
+        """Taille et efficacité du cache des leçons"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "modules": len(self._modules),
+                "cached_lessons": len(self._lessons),
+                "cache_size": self.cache_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0
+            }
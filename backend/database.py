@@ -2,139 +2,792 @@
 import json
 from datetime import datetime
 import os
+import queue
+import threading
+import time
+import atexit
+from collections import OrderedDict
+from contextlib import contextmanager
+from leaderboard import leaderboard
+from migrations import migrate
 
 DB_FILE = os.path.join(os.path.dirname(__file__), 'cyberforge.db')
 
+# Réglages du pool de connexions
+POOL_SIZE = int(os.environ.get('CYBERFORGE_DB_POOL_SIZE', 8))
+POOL_TIMEOUT = 5.0  # secondes d'attente max pour obtenir une connexion
+MMAP_SIZE = 256 * 1024 * 1024  # 256 Mo de fichier mappé en mémoire
+CACHE_SIZE_KB = 16 * 1024  # 16 Mo de cache de pages par connexion
+
+# Réglages de l'écriture différée de l'historique
+HISTORY_FLUSH_INTERVAL = 0.5  # secondes entre deux écritures groupées
+HISTORY_BATCH_SIZE = 500  # lignes max par transaction
+HISTORY_MAX_PENDING = 10000  # au-delà, l'appelant écrit lui-même (contre-pression)
+HISTORY_SHUTDOWN_TIMEOUT = 5.0  # secondes max pour vider la file à l'arrêt
+
+# Réglages du cache des utilisateurs
+USER_CACHE_SIZE = 1024  # utilisateurs gardés en mémoire
+USER_CACHE_TTL = 60.0  # secondes avant relecture depuis SQLite
+
+# Champs exposés par la liste paginée des utilisateurs -> colonne SQL
+# (le hash du mot de passe n'est jamais sélectionnable)
+USER_LIST_FIELDS = {
+    'id': 'id',
+    'username': 'username',
+    'email': 'email',
+    'level': 'level',
+    'xp': 'experience',
+    'is_admin': 'is_admin',
+    'created_at': 'created_at',
+}
+USER_LIST_PAGE_SIZE = 100
+USER_LIST_MAX_PAGE_SIZE = 500
+
+# Tables de complétion normalisées : type -> (table, colonne de l'élément, clé des réponses API)
+COMPLETION_TABLES = {
+    'module': ('module_completions', 'module_id', 'completed_modules'),
+    'quiz': ('quiz_completions', 'quiz_id', 'completed_quizzes'),
+}
+
+
+class ConnectionPool:
+    """Pool borné de connexions SQLite réutilisables.
+
+    Une connexion est attachée au thread qui l'emprunte jusqu'à sa libération :
+    les appels imbriqués dans le même thread réutilisent la même connexion.
+    """
+
+    def __init__(self, db_file, max_size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.db_file = db_file
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()  # LIFO : la connexion la plus "chaude" est réutilisée
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+
+    def _connect(self):
+        """Ouvrir une nouvelle connexion configurée (WAL, mmap, cache)"""
+        conn = sqlite3.connect(self.db_file, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Pour accéder aux colonnes par nom
+        # WAL : les lectures ne sont jamais bloquées par une écriture en cours
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+        conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KB}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        return conn
+
+    def _acquire(self):
+        """Emprunter une connexion libre, en créer une ou attendre"""
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._hits += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.max_size
+            if can_create:
+                self._created += 1
+                self._misses += 1
+
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # Pool plein : attendre qu'une connexion soit rendue
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise sqlite3.OperationalError(
+                f"Pool de connexions épuisé ({self.max_size} connexions occupées)"
+            )
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._hits += 1
+            self._waits += 1
+            self._wait_time += waited
+        return conn
+
+    def _release(self, conn):
+        """Rendre une connexion au pool (annule toute transaction oubliée)"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager fournissant la connexion du thread courant"""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            # Appel imbriqué : réutiliser la connexion déjà empruntée
+            with self._lock:
+                self._hits += 1
+            yield held
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    def stats(self):
+        """Compteurs du pool (hits, misses, attentes)"""
+        with self._lock:
+            return {
+                "size": self._created,
+                "max_size": self.max_size,
+                "idle": self._idle.qsize(),
+                "hits": self._hits,
+                "misses": self._misses,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "total_wait_ms": round(self._wait_time * 1000, 3),
+                "avg_wait_ms": round(self._wait_time * 1000 / self._waits, 3) if self._waits else 0.0
+            }
+
+    def close_all(self):
+        """Fermer toutes les connexions inactives"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+class HistoryWriter:
+    """File d'écriture différée (write-behind) pour la table progress_history.
+
+    Les événements sont mis en mémoire puis insérés par lots avec executemany,
+    dans une seule transaction, toutes les `flush_interval` secondes ou dès que
+    `batch_size` lignes sont en attente.
+    """
+
+    def __init__(self, flush_interval=HISTORY_FLUSH_INTERVAL, batch_size=HISTORY_BATCH_SIZE,
+                 max_pending=HISTORY_MAX_PENDING):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._pending = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # une seule écriture groupée à la fois
+        self._thread = None
+        self._stopping = False
+        self._enqueued = 0
+        self._written = 0
+        self._errors = 0
+        self._flushes = 0
+        self._flush_time = 0.0
+        self._last_flush = 0.0
+        self._max_flush = 0.0
+
+    def _ensure_started(self):
+        if self._thread is None and not self._stopping:
+            self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+            self._thread.start()
+
+    def add(self, username, level, experience, action):
+        """Mettre un événement en file d'attente"""
+        row = (username, level, experience, action, datetime.now().isoformat())
+        overflow = None
+        with self._cond:
+            self._ensure_started()
+            self._pending.append(row)
+            self._enqueued += 1
+            if len(self._pending) >= self.max_pending or self._stopping:
+                # File pleine (ou arrêt en cours) : l'appelant vide un lot lui-même
+                overflow = self._take_batch()
+            elif len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        if overflow:
+            self._write(overflow)
+
+    def _take_batch(self):
+        batch = self._pending[:self.batch_size]
+        del self._pending[:self.batch_size]
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or len(self._pending) >= self.batch_size,
+                    timeout=self.flush_interval
+                )
+                batch = self._take_batch()
+                done = self._stopping and not self._pending
+            if batch:
+                self._write(batch)
+            if done:
+                return
+
+    def _write(self, batch):
+        """Insérer un lot dans une seule transaction"""
+        with self._flush_lock:
+            start = time.perf_counter()
+            try:
+                with get_db_connection() as conn:
+                    conn.executemany('''
+                        INSERT INTO progress_history (username, level, experience, action, timestamp)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', batch)
+                    conn.commit()
+            except sqlite3.Error as e:
+                print(f"❌ [DB] Échec écriture historique ({len(batch)} lignes): {e}")
+                with self._cond:
+                    self._errors += len(batch)
+                return
+            elapsed = time.perf_counter() - start
+            with self._cond:
+                self._written += len(batch)
+                self._flushes += 1
+                self._flush_time += elapsed
+                self._last_flush = elapsed
+                self._max_flush = max(self._max_flush, elapsed)
+
+    def flush(self):
+        """Écrire immédiatement tout ce qui est en attente"""
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self, timeout=HISTORY_SHUTDOWN_TIMEOUT):
+        """Arrêter le thread d'écriture après avoir vidé la file"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        """Profondeur de la file et latence des écritures groupées"""
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "errors": self._errors,
+                "flushes": self._flushes,
+                "last_flush_ms": round(self._last_flush * 1000, 3),
+                "max_flush_ms": round(self._max_flush * 1000, 3),
+                "avg_flush_ms": round(self._flush_time * 1000 / self._flushes, 3) if self._flushes else 0.0
+            }
+
+
+class UserCache:
+    """Cache LRU borné avec expiration (TTL) des lignes de la table users"""
+
+    def __init__(self, max_size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # username -> (expiration, ligne)
+        self._lock = threading.Lock()
+        # Incrémenté à chaque écriture : une lecture SQLite commencée avant
+        # une écriture ne doit pas remettre en cache une ligne périmée
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, username):
+        """Ligne en cache (copie) ou None"""
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None:
+                expires_at, row = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(username)
+                    self._hits += 1
+                    return dict(row)
+                del self._entries[username]
+                self._expirations += 1
+            self._misses += 1
+            return None
+
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def put(self, username, row, generation):
+        """Mettre en cache une ligne lue alors que le cache était à `generation`"""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[username] = (time.monotonic() + self.ttl, dict(row))
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def patch(self, username, fields):
+        """Appliquer une mise à jour à la ligne en cache, si présente"""
+        with self._lock:
+            self._generation += 1
+            entry = self._entries.get(username)
+            if entry is not None:
+                expires_at, row = entry
+                self._entries[username] = (expires_at, {**row, **fields})
+
+    def invalidate(self, username):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(username, None)
+
+    def stats(self):
+        """Taux de succès, taille et évictions"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_s": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations
+            }
+
+
+pool = ConnectionPool(DB_FILE)
+atexit.register(pool.close_all)
+history_writer = HistoryWriter()
+atexit.register(history_writer.close)  # atexit est LIFO : vidé avant la fermeture du pool
+user_cache = UserCache()
+# Tenu de conn.commit() jusqu'à la mise à jour du cache utilisateurs et du classement :
+# deux écritures du même utilisateur y sont appliquées dans l'ordre de leurs commits
+_commit_lock = threading.Lock()
+
 def get_db_connection():
-    """Créer une connexion à la base de données"""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row  # Pour accéder aux colonnes par nom
-    return conn
+    """Emprunter une connexion du pool (à utiliser avec `with`)"""
+    return pool.connection()
+
+def get_pool_stats():
+    """Statistiques du pool de connexions"""
+    return pool.stats()
+
+def get_history_stats():
+    """Statistiques de l'écriture différée de l'historique"""
+    return history_writer.stats()
+
+def get_user_cache_stats():
+    """Statistiques du cache des utilisateurs"""
+    return user_cache.stats()
+
+def init_db():
+    """Appliquer les migrations en attente et charger le classement en mémoire"""
+    with get_db_connection() as conn:
+        migrate(conn)
+    load_leaderboard()
+
+def load_leaderboard():
+    """Reconstruire le classement en mémoire depuis la table users"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT username, level, experience
+            FROM users
+            WHERE is_admin = 0
+            ORDER BY experience DESC, level DESC
+        ''')
+        leaderboard.rebuild((row['username'], row['level'], row['experience']) for row in cursor)
+    print(f"📊 [DB] Classement chargé en mémoire: {len(leaderboard)} joueurs")
 
 def get_user_by_username(username):
-    """Récupérer un utilisateur par son nom"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
-    user = cursor.fetchone()
-    conn.close()
-    
+    """Récupérer un utilisateur par son nom (via le cache)"""
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+
+    generation = user_cache.generation()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
+        user = cursor.fetchone()
+
     if user:
-        return dict(user)
+        user = dict(user)
+        user_cache.put(username, user, generation)
+        return user
     return None
 
-def get_all_users():
-    """Récupérer tous les utilisateurs"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users')
-    users = cursor.fetchall()
-    conn.close()
-    
-    return [dict(user) for user in users]
+def list_users(after_id=0, limit=USER_LIST_PAGE_SIZE, fields=None, min_level=None, max_level=None,
+               is_admin=None, name_prefix=None):
+    """Page d'utilisateurs triée par id (pagination par curseur sur id).
+
+    Seuls les champs demandés sont lus (voir USER_LIST_FIELDS, plus
+    completed_modules / completed_quizzes). Retourne (utilisateurs, curseur
+    suivant) ; le curseur vaut None sur la dernière page.
+    """
+    if fields is None:
+        fields = list(USER_LIST_FIELDS) + ['completed_modules', 'completed_quizzes']
+    columns = [USER_LIST_FIELDS[f] for f in fields if f in USER_LIST_FIELDS]
+    completion_keys = [key for _, _, key in COMPLETION_TABLES.values() if key in fields]
+    limit = max(1, min(limit, USER_LIST_MAX_PAGE_SIZE))
+
+    conditions = ['id > ?']
+    params = [after_id]
+    if min_level is not None:
+        conditions.append('level >= ?')
+        params.append(min_level)
+    if max_level is not None:
+        conditions.append('level <= ?')
+        params.append(max_level)
+    if is_admin is not None:
+        conditions.append('is_admin = ?')
+        params.append(1 if is_admin else 0)
+    if name_prefix:
+        # Intervalle plutôt que LIKE : sensible à la casse et utilisable par l'index
+        conditions.append('username >= ? AND username < ?')
+        params.extend([name_prefix, name_prefix + '\U0010ffff'])
+    params.append(limit + 1)
+
+    select = ', '.join(dict.fromkeys(['id', 'username'] + columns))
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {select} FROM users WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ?",
+            params
+        )
+        rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        users = []
+        for row in rows:
+            user = {field: row[USER_LIST_FIELDS[field]] for field in fields if field in USER_LIST_FIELDS}
+            if 'is_admin' in user:
+                user['is_admin'] = bool(user['is_admin'])
+            users.append(user)
+
+        # Complétions de la page entière : une requête par table
+        if completion_keys and rows:
+            by_username = {row['username']: user for row, user in zip(rows, users)}
+            for user in users:
+                for key in completion_keys:
+                    user[key] = []
+            placeholders = ', '.join('?' * len(by_username))
+            for table, column, key in COMPLETION_TABLES.values():
+                if key not in completion_keys:
+                    continue
+                cursor.execute(
+                    f'SELECT username, {column} FROM {table} WHERE username IN ({placeholders}) ORDER BY completed_at',
+                    list(by_username)
+                )
+                for username, item_id in cursor:
+                    by_username[username][key].append(item_id)
+
+    next_cursor = rows[-1]['id'] if has_more else None
+    return users, next_cursor
+
+def iter_users(batch_size=USER_LIST_MAX_PAGE_SIZE, **filters):
+    """Parcourir tous les utilisateurs page par page (mémoire constante)"""
+    after_id = 0
+    while True:
+        users, after_id = list_users(after_id=after_id, limit=batch_size, **filters)
+        yield from users
+        if after_id is None:
+            return
+
+def count_users():
+    """Compter les utilisateurs enregistrés"""
+    with get_db_connection() as conn:
+        return conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
 
 def create_user(username, email, password, is_admin=False):
     """Créer un nouvel utilisateur"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    user_id = f"user_{username}"
-    
-    try:
-        cursor.execute('''
-            INSERT INTO users (username, email, password, created_at, level, experience, is_admin, progress, completed_modules, completed_quizzes)
-            VALUES (?, ?, ?, ?, 1, 0, ?, '{}', '[]', '[]')
-        ''', (username, email, password, datetime.now().isoformat(), 1 if is_admin else 0))
-        
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                INSERT INTO users (username, email, password, created_at, level, experience, is_admin, progress, completed_modules, completed_quizzes)
+                VALUES (?, ?, ?, ?, 1, 0, ?, '{}', '[]', '[]')
+            ''', (username, email, password, datetime.now().isoformat(), 1 if is_admin else 0))
+
+            with _commit_lock:
+                conn.commit()
+                user_cache.invalidate(username)
+                if not is_admin:
+                    leaderboard.update(username, 1, 0)
+            print(f"✅ [DB] Utilisateur '{username}' créé")
+            return True
+        except sqlite3.IntegrityError as e:
+            print(f"❌ [DB] Erreur création utilisateur: {e}")
+            return False
+
+def update_password(username, password):
+    """Remplacer l'empreinte du mot de passe (mise à niveau de l'algorithme)"""
+    with get_db_connection() as conn:
+        conn.execute('UPDATE users SET password = ? WHERE username = ?', (password, username))
+        with _commit_lock:
+            conn.commit()
+            user_cache.patch(username, {'password': password})
+
+def delete_user(username):
+    """Supprimer un utilisateur"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM users WHERE username = ?', (username,))
+        deleted = cursor.rowcount > 0
+        for table, _, _ in COMPLETION_TABLES.values():
+            cursor.execute(f'DELETE FROM {table} WHERE username = ?', (username,))
+        with _commit_lock:
+            conn.commit()
+            user_cache.invalidate(username)
+            leaderboard.remove(username)
+        return deleted
+
+def _completion_ids(items):
+    """Identifiants (texte, sans doublons) d'une liste de complétions"""
+    ids = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get('id')
+        if item is not None and item != '':
+            ids.append(str(item))
+    return list(dict.fromkeys(ids))
+
+def _insert_completions(cursor, kind, username, items):
+    """Ajouter des complétions (celles déjà connues sont ignorées)"""
+    table, column, _ = COMPLETION_TABLES[kind]
+    now = datetime.now().isoformat()
+    cursor.executemany(
+        f'INSERT OR IGNORE INTO {table} (username, {column}, completed_at) VALUES (?, ?, ?)',
+        [(username, item_id, now) for item_id in _completion_ids(items)]
+    )
+    return cursor.rowcount
+
+def _fetch_completions(cursor, username):
+    completions = {}
+    for table, column, key in COMPLETION_TABLES.values():
+        cursor.execute(
+            f'SELECT {column} FROM {table} WHERE username = ? ORDER BY completed_at, {column}',
+            (username,)
+        )
+        completions[key] = [row[0] for row in cursor.fetchall()]
+    return completions
+
+def mark_completed(username, kind, item_id):
+    """Marquer un module ('module') ou un quiz ('quiz') comme terminé"""
+    with get_db_connection() as conn:
+        added = _insert_completions(conn.cursor(), kind, username, [item_id])
+        conn.commit()
+        return added > 0
+
+def get_user_completions(username):
+    """Modules et quiz terminés par un utilisateur"""
+    with get_db_connection() as conn:
+        return _fetch_completions(conn.cursor(), username)
+
+def load_sessions(now):
+    """Sessions encore valides : liste de (token_hash, username, expires_at)"""
+    with get_db_connection() as conn:
+        cursor = conn.execute(
+            'SELECT token_hash, username, expires_at FROM sessions WHERE expires_at > ?', (now,)
+        )
+        return [tuple(row) for row in cursor]
+
+def save_session(token_hash, username, created_at, expires_at):
+    """Enregistrer une session"""
+    with get_db_connection() as conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO sessions (token_hash, username, created_at, expires_at) VALUES (?, ?, ?, ?)',
+            (token_hash, username, created_at, expires_at)
+        )
+        conn.commit()
+
+def delete_sessions(token_hashes):
+    """Supprimer des sessions"""
+    with get_db_connection() as conn:
+        conn.executemany('DELETE FROM sessions WHERE token_hash = ?', [(h,) for h in token_hashes])
         conn.commit()
-        print(f"✅ [DB] Utilisateur '{username}' créé")
-        return True
-    except sqlite3.IntegrityError as e:
-        print(f"❌ [DB] Erreur création utilisateur: {e}")
-        return False
-    finally:
-        conn.close()
+
+def delete_user_sessions(username):
+    """Supprimer toutes les sessions d'un utilisateur"""
+    with get_db_connection() as conn:
+        conn.execute('DELETE FROM sessions WHERE username = ?', (username,))
+        conn.commit()
+
+def purge_expired_sessions(now):
+    """Supprimer les sessions expirées"""
+    with get_db_connection() as conn:
+        conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (now,))
+        conn.commit()
+
+def save_revocation(username, revoked_at):
+    """Enregistrer la révocation des tokens d'un utilisateur"""
+    with get_db_connection() as conn:
+        conn.execute('''
+            INSERT INTO session_revocations (username, revoked_at) VALUES (?, ?)
+            ON CONFLICT (username) DO UPDATE SET revoked_at = MAX(revoked_at, excluded.revoked_at)
+        ''', (username, revoked_at))
+        conn.commit()
+
+def load_revocations(since):
+    """Révocations postérieures à `since` : liste de (username, revoked_at)"""
+    with get_db_connection() as conn:
+        cursor = conn.execute(
+            'SELECT username, revoked_at FROM session_revocations WHERE revoked_at > ?', (since,)
+        )
+        return [tuple(row) for row in cursor]
+
+def count_completions(kind, item_id):
+    """Nombre d'utilisateurs ayant terminé un module ou un quiz"""
+    table, column, _ = COMPLETION_TABLES[kind]
+    with get_db_connection() as conn:
+        return conn.execute(f'SELECT COUNT(*) FROM {table} WHERE {column} = ?', (item_id,)).fetchone()[0]
+
+def get_completion_counts(kind):
+    """Nombre d'utilisateurs ayant terminé chaque module ou quiz"""
+    table, column, _ = COMPLETION_TABLES[kind]
+    with get_db_connection() as conn:
+        cursor = conn.execute(f'SELECT {column}, COUNT(*) FROM {table} GROUP BY {column}')
+        return {item_id: count for item_id, count in cursor}
+
+def apply_progress_update(username, experience=None, level=None, progress=None, completed_modules=None, completed_quizzes=None):
+    """Mettre à jour la progression en une seule transaction.
+
+    Niveau, XP et progression sont écrits par une seule requête UPDATE ... RETURNING ;
+    les complétions sont ajoutées ligne par ligne. Retourne les niveau/XP avant et
+    après la mise à jour (None si l'utilisateur n'existe pas), sans relire la ligne.
+    """
+    update_row = experience is not None or level is not None or progress is not None
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        if not update_row:
+            # Rien à écrire dans users : simple lecture de l'état courant
+            cursor.execute('''
+                SELECT level AS previous_level, experience AS previous_experience,
+                       level, experience, is_admin
+                FROM users WHERE username = ?
+            ''', (username,))
+        else:
+            # Les expressions du SET voient les valeurs d'avant la mise à jour :
+            # previous_* conserve donc l'ancien état, renvoyé par RETURNING
+            cursor.execute('''
+                UPDATE users SET
+                    previous_level = level,
+                    previous_experience = experience,
+                    experience = COALESCE(?, experience),
+                    level = COALESCE(?, level),
+                    progress = COALESCE(?, progress)
+                WHERE username = ?
+                RETURNING previous_level, previous_experience, level, experience, is_admin
+            ''', (
+                experience,
+                level,
+                json.dumps(progress) if progress is not None else None,
+                username
+            ))
+        row = cursor.fetchone()
+
+        if not row:
+            return None
+
+        if completed_modules:
+            _insert_completions(cursor, 'module', username, completed_modules)
+        if completed_quizzes:
+            _insert_completions(cursor, 'quiz', username, completed_quizzes)
+        completions = _fetch_completions(cursor, username)
+
+        cached_fields = None
+        if update_row:
+            cached_fields = {
+                'previous_level': row['previous_level'],
+                'previous_experience': row['previous_experience'],
+                'level': row['level'],
+                'experience': row['experience']
+            }
+            if progress is not None:
+                cached_fields['progress'] = json.dumps(progress)
+        # Cache et classement mis à jour dans l'ordre des commits (un autre
+        # écrivain du même utilisateur ne peut pas s'intercaler après notre commit)
+        with _commit_lock:
+            conn.commit()
+            if cached_fields is not None:
+                user_cache.patch(username, cached_fields)
+                if not row['is_admin']:
+                    leaderboard.update(username, row['level'], row['experience'])
+
+    if update_row:
+        # Ajouter à l'historique (écrit par lots en arrière-plan)
+        history_writer.add(username, row['level'], row['experience'], 'progress_update')
+        print(f"✅ [DB] Progression de '{username}' mise à jour: Level {row['level']}, XP {row['experience']}")
+
+    return {
+        "old_level": row['previous_level'],
+        "old_experience": row['previous_experience'],
+        "level": row['level'],
+        "experience": row['experience'],
+        **completions
+    }
 
 def update_user_progress(username, experience=None, level=None, progress=None, completed_modules=None, completed_quizzes=None):
     """Mettre à jour la progression d'un utilisateur"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Récupérer les données actuelles
-    cursor.execute('SELECT level, experience FROM users WHERE username = ?', (username,))
-    current = cursor.fetchone()
-    
-    if not current:
-        conn.close()
-        return False
-    
-    old_level = current['level']
-    old_exp = current['experience']
-    
-    # Construire la requête de mise à jour
-    updates = []
-    params = []
-    
-    if experience is not None:
-        updates.append('experience = ?')
-        params.append(experience)
-    
-    if level is not None:
-        updates.append('level = ?')
-        params.append(level)
-    
-    if progress is not None:
-        updates.append('progress = ?')
-        params.append(json.dumps(progress))
-    
-    if completed_modules is not None:
-        updates.append('completed_modules = ?')
-        params.append(json.dumps(completed_modules))
-    
-    if completed_quizzes is not None:
-        updates.append('completed_quizzes = ?')
-        params.append(json.dumps(completed_quizzes))
-    
-    if updates:
-        params.append(username)
-        query = f"UPDATE users SET {', '.join(updates)} WHERE username = ?"
-        cursor.execute(query, params)
-        
-        # Ajouter à l'historique
-        cursor.execute('''
-            INSERT INTO progress_history (username, level, experience, action, timestamp)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (username, level or old_level, experience or old_exp, 'progress_update', datetime.now().isoformat()))
-        
-        conn.commit()
-        print(f"✅ [DB] Progression de '{username}' mise à jour: Level {level or old_level}, XP {experience or old_exp}")
-    
-    conn.close()
-    return True
+    return apply_progress_update(username, experience, level, progress, completed_modules, completed_quizzes) is not None
 
 def get_leaderboard(limit=50):
-    """Récupérer le classement des joueurs"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT username, level, experience 
-        FROM users 
-        WHERE is_admin = 0 
-        ORDER BY experience DESC, level DESC 
-        LIMIT ?
-    ''', (limit,))
-    
-    users = cursor.fetchall()
-    conn.close()
-    
-    leaderboard = []
-    for user in users:
-        leaderboard.append({
-            'username': user['username'],
-            'level': user['level'],
-            'xp': user['experience'],
-            'score': user['experience']
-        })
-    
-    return leaderboard
+    """Récupérer le classement des joueurs (servi depuis la mémoire)"""
+    if not leaderboard.loaded:
+        load_leaderboard()
+    return leaderboard.top(limit)
+
+def get_leaderboard_version():
+    """Compteur incrémenté à chaque changement du classement (ETag)"""
+    if not leaderboard.loaded:
+        load_leaderboard()
+    return leaderboard.version
+
+def get_user_rank(username):
+    """Rang d'un joueur dans le classement (None s'il n'y figure pas)"""
+    if not leaderboard.loaded:
+        load_leaderboard()
+    return leaderboard.rank(username)
+
+def get_leaderboard_around(username, radius=5):
+    """Joueurs classés autour d'un joueur (None s'il n'y figure pas)"""
+    if not leaderboard.loaded:
+        load_leaderboard()
+    return leaderboard.around(username, radius)
+
+def get_leaderboard_size():
+    """Nombre de joueurs classés"""
+    if not leaderboard.loaded:
+        load_leaderboard()
+    return len(leaderboard)
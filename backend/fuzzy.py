@@ -0,0 +1,88 @@
+"""
+Distance d'édition bornée et BK-tree pour la tolérance aux fautes de frappe
+"""
+
+
+def levenshtein(a, b, bound=None):
+    """Distance d'édition entre a et b ; au-delà de `bound`, retourne bound + 1 sans finir le calcul"""
+    if len(a) < len(b):
+        a, b = b, a
+    if bound is not None and len(a) - len(b) > bound:
+        return bound + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if bound is not None and min(current) > bound:
+            return bound + 1
+        previous = current
+    if bound is not None and previous[-1] > bound:
+        return bound + 1
+    return previous[-1]
+
+
+class _Node:
+    __slots__ = ('word', 'children', 'max_edge')
+
+    def __init__(self, word):
+        self.word = word
+        self.children = {}  # distance au mot du nœud -> nœud enfant
+        self.max_edge = 0
+
+
+class BKTree:
+    """Arbre de Burkhard-Keller sur des mots, interrogé par rayon d'édition.
+
+    Pour une requête de rayon r, seuls les enfants dont l'arête est dans
+    [d - r, d + r] sont visités (inégalité triangulaire). La distance à un
+    nœud n'est calculée que jusqu'à r + la plus grande arête sortante :
+    au-delà, aucun enfant ne peut être dans l'intervalle.
+    """
+
+    def __init__(self, words=()):
+        self._root = None
+        self._size = 0
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, word):
+        if self._root is None:
+            self._root = _Node(word)
+            self._size = 1
+            return
+        node = self._root
+        while True:
+            distance = levenshtein(word, node.word)
+            if distance == 0:
+                return
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _Node(word)
+                node.max_edge = max(node.max_edge, distance)
+                self._size += 1
+                return
+            node = child
+
+    def search(self, word, radius):
+        """[(distance, mot)] des mots à au plus `radius` modifications de `word`"""
+        if self._root is None:
+            return []
+        found = []
+        pending = [self._root]
+        while pending:
+            node = pending.pop()
+            distance = levenshtein(word, node.word, bound=radius + node.max_edge)
+            if distance <= radius:
+                found.append((distance, node.word))
+            for edge, child in node.children.items():
+                if distance - radius <= edge <= distance + radius:
+                    pending.append(child)
+        return found
@@ -0,0 +1,193 @@
+"""
+Correction des réponses de quêtes côté serveur : alternatives compilées une fois par version de quête
+"""
+import threading
+import time
+
+from fuzzy import BKTree
+from metrics import LatencyRecorder
+from text_normalize import squash
+
+MIN_PARTIAL_LENGTH = 3  # une réponse plus courte doit être exacte (même règle que le frontend)
+MAX_GRADE_BATCH = 500
+DEFAULT_WORD_TOLERANCE = 1  # fautes acceptées par mot, sauf tolérance fixée par la question
+MAX_TOLERANCE = 2           # fautes par mot au plus, même si la question en demande davantage
+MIN_FUZZY_WORD_LENGTH = 5   # mots plus courts (sigles, articles, "cle") : aucune faute acceptée
+MAX_FUZZY_LENGTH = 100      # au-delà, pas de tolérance : le coût par réponse reste borné
+_SEPARATOR = '\x00'         # jamais présent dans une réponse normalisée
+
+
+class CompiledQuestion:
+    """Alternatives normalisées d'une question ("a|b|c"), prêtes à comparer.
+
+    Une réponse est juste si elle est égale à une alternative, ou si elle
+    fait au moins MIN_PARTIAL_LENGTH caractères et est contenue dans l'une
+    d'elles. Les alternatives sont jointes par un séparateur absent des
+    réponses : le test d'inclusion est une seule recherche de sous-chaîne.
+
+    La tolérance aux fautes se compte mot par mot : même nombre de mots,
+    chaque mot identique ou, s'il fait au moins MIN_FUZZY_WORD_LENGTH
+    lettres, à au plus `tolerance` modifications. Un préfixe de négation
+    ("irreversible" / "reversible") coûte deux modifications et reste refusé.
+    """
+
+    __slots__ = ('question_id', 'exact', 'haystack', 'expected', 'explanation',
+                 'tolerance', 'phrases', 'tree')
+
+    def __init__(self, question_id, answer, explanation, tolerance=None):
+        alternatives = [squash(alt) for alt in str(answer or '').split('|')]
+        alternatives = [alt for alt in alternatives if alt]
+        self.question_id = question_id
+        self.exact = frozenset(alternatives)
+        self.haystack = _SEPARATOR.join(alternatives)
+        self.expected = str(answer or '').split('|')[0].strip()
+        self.explanation = explanation
+        self.tolerance = (min(max(int(tolerance), 0), MAX_TOLERANCE) if tolerance is not None
+                          else DEFAULT_WORD_TOLERANCE)
+        # Alternatives découpées en mots ; BK-tree sur les mots assez longs pour tolérer une faute
+        self.phrases = [tuple(alt.split(' ')) for alt in alternatives]
+        long_words = {word for phrase in self.phrases for word in phrase if len(word) >= MIN_FUZZY_WORD_LENGTH}
+        self.tree = BKTree(long_words) if self.tolerance and long_words else None
+
+    def _fuzzy_match(self, normalized):
+        """Une alternative correspond-elle mot à mot, à `tolerance` fautes près par mot ?"""
+        words = normalized.split(' ')
+        close = {}  # mot de la réponse -> mots des alternatives assez proches
+        for phrase in self.phrases:
+            if len(phrase) != len(words):
+                continue
+            for expected, given in zip(phrase, words):
+                if expected == given:
+                    continue
+                if given not in close:
+                    close[given] = {word for _, word in self.tree.search(given, self.tolerance)}
+                if expected not in close[given]:
+                    break
+            else:
+                return True
+        return False
+
+    def matches(self, answer, fuzzy=False):
+        """(juste, approchée) : approchée si acceptée seulement grâce à la tolérance"""
+        normalized = squash(answer.replace(_SEPARATOR, ''))
+        if not normalized:
+            return False, False
+        if normalized in self.exact:
+            return True, False
+        if len(normalized) >= MIN_PARTIAL_LENGTH and normalized in self.haystack:
+            return True, False
+        if fuzzy and self.tree is not None and len(normalized) <= MAX_FUZZY_LENGTH:
+            if self._fuzzy_match(normalized):
+                return True, True
+        return False, False
+
+
+class _CompiledQuest:
+    __slots__ = ('version', 'questions')
+
+    def __init__(self, version, questions):
+        self.version = version
+        self.questions = questions  # identifiant (str) -> CompiledQuestion
+
+
+def compile_quest(questions):
+    """Questions d'une quête -> {identifiant: CompiledQuestion} (position si pas d'identifiant)"""
+    compiled = {}
+    for position, question in enumerate(questions or []):
+        if not isinstance(question, dict):
+            continue
+        question_id = question.get('id', position)
+        tolerance = question.get('tolerance')
+        if not isinstance(tolerance, int) or isinstance(tolerance, bool):
+            tolerance = None
+        compiled[str(question_id)] = CompiledQuestion(question_id, question.get('answer'),
+                                                      question.get('explanation'), tolerance)
+    return compiled
+
+
+class GradingEngine:
+    """Correction par lots, avec les matchers de chaque quête gardés par version du catalogue.
+
+    Une quête est compilée à la première correction après chaque changement
+    de son fichier (QuestCatalog.quest_version) ; les corrections suivantes
+    ne font que normaliser la réponse et la comparer. En mode `fuzzy`, une
+    réponse à une faute près par mot long d'une alternative (BK-tree des mots,
+    compilé avec la question) est acceptée et signalée comme approchée.
+    """
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+        self._quests = {}  # quest_id -> _CompiledQuest
+        self._lock = threading.Lock()
+        self._compiles = 0
+        self._hits = 0
+        self._graded = 0
+        self._fuzzy_matches = 0
+        self._latency = LatencyRecorder()
+
+    def compiled(self, quest_id):
+        """Matchers de la version courante d'une quête, None si elle n'existe pas"""
+        version = self._catalog.quest_version(quest_id)
+        with self._lock:
+            entry = self._quests.get(quest_id)
+            if version is None:
+                self._quests.pop(quest_id, None)
+                return None
+            if entry is not None and entry.version == version:
+                self._hits += 1
+                return entry.questions
+
+        # Relève l'erreur de lecture si le fichier de la quête est invalide
+        questions = self._catalog.get(quest_id)
+        if questions is None:
+            return None
+        entry = _CompiledQuest(version, compile_quest(questions))
+        with self._lock:
+            self._quests[quest_id] = entry
+            self._compiles += 1
+        return entry.questions
+
+    def grade(self, quest_id, answers, fuzzy=False):
+        """Corriger [{question_id, answer}] ; None si la quête n'existe pas"""
+        started = time.perf_counter()
+        questions = self.compiled(quest_id)
+        if questions is None:
+            return None
+        results = []
+        correct = 0
+        approximate = 0
+        for item in answers:
+            question = questions.get(str(item.get('question_id')))
+            if question is None:
+                results.append({"question_id": item.get('question_id'), "error": "Unknown question"})
+                continue
+            answer = item.get('answer')
+            ok, fuzzy_match = question.matches(answer, fuzzy) if isinstance(answer, str) else (False, False)
+            correct += ok
+            approximate += fuzzy_match
+            result = {
+                "question_id": question.question_id,
+                "correct": ok,
+                "expected": question.expected,
+                "explanation": question.explanation
+            }
+            if fuzzy:
+                result["fuzzy"] = fuzzy_match
+            results.append(result)
+        with self._lock:
+            self._graded += len(results)
+            self._fuzzy_matches += approximate
+        self._latency.record((time.perf_counter() - started) * 1000)
+        return {"quest_id": quest_id, "score": correct, "total": len(results), "results": results}
+
+    def stats(self):
+        """Quêtes compilées, réutilisations et latence des lots"""
+        with self._lock:
+            return {
+                "compiled_quests": len(self._quests),
+                "compiles": self._compiles,
+                "hits": self._hits,
+                "graded_answers": self._graded,
+                "fuzzy_matches": self._fuzzy_matches,
+                "batch_ms": self._latency.summary()
+            }
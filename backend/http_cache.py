@@ -0,0 +1,171 @@
+"""
+Réponses conditionnelles (ETag / If-None-Match) à partir de compteurs de version,
+et cache de réponses pré-sérialisées et pré-compressées
+"""
+import functools
+import gzip
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+
+from flask import Response, make_response, request
+
+# Change à chaque démarrage : les compteurs repartent de zéro, les ETags ne doivent pas se répéter
+_EPOCH = secrets.token_hex(8)
+
+DEFAULT_CACHE_CONTROL = 'no-cache'  # le client garde la réponse mais revalide à chaque fois
+GZIP_MIN_SIZE = 1024  # en dessous, la compression ne vaut pas l'en-tête supplémentaire
+RESPONSE_CACHE_SIZE = 256
+
+_lock = threading.Lock()
+_counters = {"full": 0, "not_modified": 0}
+
+
+def make_etag(*parts):
+    """ETag fort (sans guillemets) pour la requête courante et des versions données"""
+    key = '|'.join([_EPOCH, request.full_path] + [str(part) for part in parts])
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def accepts_gzip():
+    """Le client accepte-t-il une réponse gzip (Accept-Encoding) ?"""
+    return request.accept_encodings['gzip'] > 0
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def conditional(version, cache_control=DEFAULT_CACHE_CONTROL, vary_encoding=False):
+    """Décorateur de route : 304 si If-None-Match correspond à la version courante.
+
+    `version(**view_args)` doit être peu coûteux (lecture de compteurs) : il est
+    évalué avant la vue, qui n'est pas appelée du tout pour une réponse 304.
+    La version est lue avant la vue : si le contenu change entre les deux,
+    l'ETag envoyé est l'ancien et la requête suivante recevra le nouveau contenu.
+    Avec `vary_encoding`, les variantes gzip et non compressée ont des ETags distincts.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            parts = [version(**kwargs)]
+            if vary_encoding:
+                parts.append('gzip' if accepts_gzip() else 'identity')
+            etag = make_etag(*parts)
+            if request.if_none_match.contains_weak(etag):
+                _count("not_modified")
+                response = Response(status=304)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = cache_control
+                if vary_encoding:
+                    response.vary.add('Accept-Encoding')
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _count("full")
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = cache_control
+                if vary_encoding:
+                    response.vary.add('Accept-Encoding')
+            return response
+        return wrapper
+    return decorator
+
+
+def get_stats():
+    """Réponses complètes et 304 servies"""
+    with _lock:
+        full, not_modified = _counters["full"], _counters["not_modified"]
+    total = full + not_modified
+    return {
+        "full": full,
+        "not_modified": not_modified,
+        "not_modified_rate": round(not_modified / total, 3) if total else 0.0
+    }
+
+
+class _CachedBody:
+    """Corps JSON d'une version de contenu, brut et compressé"""
+
+    __slots__ = ('version', 'identity', 'gzipped')
+
+    def __init__(self, version, identity, gzipped):
+        self.version = version
+        self.identity = identity
+        self.gzipped = gzipped  # None si le corps est trop petit pour être compressé
+
+
+class ResponseCache:
+    """Réponses JSON sérialisées et compressées une seule fois par version de contenu.
+
+    `serialize(obj)` produit le corps JSON en octets (celui de jsonify). Une entrée est
+    reconstruite quand la version demandée diffère de celle en cache ; les
+    entrées les moins récemment servies sont oubliées au-delà de `max_entries`.
+    """
+
+    def __init__(self, serialize, max_entries=RESPONSE_CACHE_SIZE):
+        self._serialize = serialize
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # clé -> _CachedBody
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._builds = 0
+
+    def _body(self, key, version, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+
+        # Construction hors verrou : sérialisation et compression sont les parties coûteuses
+        obj = build()
+        if obj is None:
+            return None
+        identity = self._serialize(obj)
+        gzipped = gzip.compress(identity, compresslevel=9, mtime=0) if len(identity) >= GZIP_MIN_SIZE else None
+        entry = _CachedBody(version, identity, gzipped)
+
+        with self._lock:
+            self._builds += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def warm(self, key, version, build):
+        """Construire l'entrée d'une nouvelle version sans attendre une requête"""
+        self._body(key, version, build)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def respond(self, key, version, build):
+        """Réponse Flask pour (clé, version), ou None si build() ne trouve rien"""
+        entry = self._body(key, version, build)
+        if entry is None:
+            return None
+        if entry.gzipped is not None and accepts_gzip():
+            response = Response(entry.gzipped, mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(entry.identity, mimetype='application/json')
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def stats(self):
+        """Entrées, réutilisations et reconstructions"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "builds": self._builds,
+                "bytes": sum(len(e.identity) + len(e.gzipped or b'') for e in self._entries.values())
+            }
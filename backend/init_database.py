@@ -1,85 +1,51 @@
-﻿import sqlite3
+"""
+Initialiser la base de données SQLite et importer un export users_db.json
+
+Usage : python backend/init_database.py [chemin/vers/users_db.json]
+"""
 import json
 import os
-from datetime import datetime
+import sqlite3
+import sys
+import time
+
+from migrations import migrate, current_version, import_users
 
-# Chemin de la base de données
-DB_FILE = 'backend/cyberforge.db'
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Créer la connexion
-conn = sqlite3.connect(DB_FILE)
-cursor = conn.cursor()
+# Chemin de la base de données (indépendant du répertoire courant)
+DB_FILE = os.path.join(BACKEND_DIR, 'cyberforge.db')
+USERS_JSON = os.path.join(BACKEND_DIR, 'users_db.json')
 
-# Créer la table users avec tous les champs nécessaires
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS users (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username TEXT UNIQUE NOT NULL,
-    email TEXT UNIQUE NOT NULL,
-    password TEXT NOT NULL,
-    created_at TEXT NOT NULL,
-    level INTEGER DEFAULT 1,
-    experience INTEGER DEFAULT 0,
-    is_admin INTEGER DEFAULT 0,
-    progress TEXT DEFAULT '{}',
-    completed_modules TEXT DEFAULT '[]',
-    completed_quizzes TEXT DEFAULT '[]'
-)
-''')
 
-print("✅ Table 'users' créée avec succès")
+def main(users_json=USERS_JSON):
+    conn = sqlite3.connect(DB_FILE)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
 
-# Créer une table pour l'historique des progressions (pour audit)
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS progress_history (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username TEXT NOT NULL,
-    level INTEGER,
-    experience INTEGER,
-    action TEXT,
-    timestamp TEXT NOT NULL,
-    FOREIGN KEY (username) REFERENCES users(username)
-)
-''')
+    # Créer ou mettre à jour le schéma
+    applied = migrate(conn)
+    print(f"✅ Schéma à jour (version {current_version(conn)}, {len(applied)} migration(s) appliquée(s))")
 
-print("✅ Table 'progress_history' créée avec succès")
+    # Migrer les données depuis users_db.json
+    if os.path.exists(users_json):
+        with open(users_json, 'r', encoding='utf-8') as f:
+            users_data = json.load(f)
 
-# Migrer les données depuis users_db.json
-USERS_JSON = 'backend/users_db.json'
-if os.path.exists(USERS_JSON):
-    with open(USERS_JSON, 'r', encoding='utf-8') as f:
-        users_data = json.load(f)
-    
-    for username, user_data in users_data.items():
-        try:
-            cursor.execute('''
-                INSERT INTO users (username, email, password, created_at, level, experience, is_admin, progress, completed_modules, completed_quizzes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                username,
-                user_data.get('email', ''),
-                user_data.get('password', ''),
-                user_data.get('created_at', datetime.now().isoformat()),
-                user_data.get('level', 1),
-                user_data.get('experience', 0),
-                1 if user_data.get('is_admin', False) else 0,
-                json.dumps(user_data.get('progress', {})),
-                json.dumps(user_data.get('completed_modules', [])),
-                json.dumps(user_data.get('completed_quizzes', []))
-            ))
-            print(f"✅ Utilisateur '{username}' migré: Level {user_data.get('level', 1)}, XP {user_data.get('experience', 0)}")
-        except sqlite3.IntegrityError:
-            print(f"⚠️ Utilisateur '{username}' existe déjà, ignoré")
+        start = time.perf_counter()
+        added = import_users(conn, users_data)
+        elapsed = time.perf_counter() - start
+        print(f"✅ {added} utilisateur(s) importé(s) sur {len(users_data)} en {elapsed:.2f}s "
+              f"({len(users_data) - added} déjà présent(s), ignoré(s))")
+    else:
+        print(f"⚠️ Fichier {users_json} introuvable, aucun utilisateur importé")
 
-conn.commit()
+    total = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+    conn.close()
+    print(f"\n📊 Total utilisateurs dans la base: {total}")
+    print("✅ Base de données initialisée avec succès!")
+    print(f"📁 Fichier: {DB_FILE}")
 
-# Afficher les utilisateurs migrés
-cursor.execute('SELECT username, level, experience FROM users')
-users = cursor.fetchall()
-print(f"\n📊 Total utilisateurs dans la base: {len(users)}")
-for user in users:
-    print(f"   - {user[0]}: Level {user[1]}, XP {user[2]}")
 
-conn.close()
-print("\n✅ Base de données initialisée avec succès!")
-print(f"📁 Fichier: {os.path.abspath(DB_FILE)}")
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
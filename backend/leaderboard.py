@@ -0,0 +1,225 @@
+"""
+Classement des joueurs maintenu en mémoire (skip list indexable triée par XP)
+"""
+import random
+import threading
+
+MAX_LEVEL = 24    # suffisant pour plusieurs millions de joueurs
+PROBABILITY = 0.25
+
+
+class _Node:
+    """Nœud de la skip list"""
+
+    __slots__ = ('key', 'forward', 'span')
+
+    def __init__(self, key, height):
+        self.key = key
+        self.forward = [None] * height
+        # span[i] : nombre de positions franchies par le lien forward[i]
+        self.span = [0] * height
+
+
+class SkipList:
+    """Liste ordonnée indexable : insertion, suppression, rang et sélection en O(log n)"""
+
+    def __init__(self):
+        self._head = _Node(None, MAX_LEVEL)
+        self._level = 1
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _random_height(self):
+        height = 1
+        while height < MAX_LEVEL and random.random() < PROBABILITY:
+            height += 1
+        return height
+
+    def _find_predecessors(self, key):
+        """Derniers nœuds strictement inférieurs à key et leur rang, pour chaque niveau"""
+        update = [self._head] * MAX_LEVEL
+        ranks = [0] * MAX_LEVEL
+        node = self._head
+        rank = 0
+        for i in range(self._level - 1, -1, -1):
+            while node.forward[i] is not None and node.forward[i].key < key:
+                rank += node.span[i]
+                node = node.forward[i]
+            update[i] = node
+            ranks[i] = rank
+        return update, ranks
+
+    def insert(self, key):
+        """Insérer une clé (les clés doivent être uniques)"""
+        update, ranks = self._find_predecessors(key)
+        height = self._random_height()
+        if height > self._level:
+            for i in range(self._level, height):
+                self._head.span[i] = self._size
+            self._level = height
+        node = _Node(key, height)
+        for i in range(height):
+            node.forward[i] = update[i].forward[i]
+            update[i].forward[i] = node
+            node.span[i] = update[i].span[i] - (ranks[0] - ranks[i])
+            update[i].span[i] = (ranks[0] - ranks[i]) + 1
+        # Les liens qui passent au-dessus du nouveau nœud franchissent une position de plus
+        for i in range(height, self._level):
+            update[i].span[i] += 1
+        self._size += 1
+
+    def remove(self, key):
+        """Supprimer une clé, retourne False si elle est absente"""
+        update, _ = self._find_predecessors(key)
+        node = update[0].forward[0]
+        if node is None or node.key != key:
+            return False
+        for i in range(self._level):
+            if update[i].forward[i] is node:
+                update[i].span[i] += node.span[i] - 1
+                update[i].forward[i] = node.forward[i]
+            else:
+                update[i].span[i] -= 1
+        while self._level > 1 and self._head.forward[self._level - 1] is None:
+            self._level -= 1
+        self._size -= 1
+        return True
+
+    def rank(self, key):
+        """Rang (à partir de 1) d'une clé, ou None si elle est absente"""
+        node = self._head
+        rank = 0
+        for i in range(self._level - 1, -1, -1):
+            while node.forward[i] is not None and node.forward[i].key <= key:
+                rank += node.span[i]
+                node = node.forward[i]
+            if node.key == key:
+                return rank
+        return None
+
+    def _node_at(self, rank):
+        """Nœud situé au rang donné (à partir de 1)"""
+        node = self._head
+        traversed = 0
+        for i in range(self._level - 1, -1, -1):
+            while node.forward[i] is not None and traversed + node.span[i] <= rank:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if traversed == rank:
+                return node
+        return None
+
+    def slice(self, start, count):
+        """Les `count` clés à partir du rang `start` (à partir de 1)"""
+        keys = []
+        if start < 1 or start > self._size:
+            return keys
+        node = self._node_at(start)
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.forward[0]
+        return keys
+
+    def first(self, count):
+        """Les `count` premières clés dans l'ordre"""
+        return self.slice(1, count)
+
+    def clear(self):
+        self._head = _Node(None, MAX_LEVEL)
+        self._level = 1
+        self._size = 0
+
+
+class Leaderboard:
+    """Classement incrémental : XP décroissante, puis niveau décroissant"""
+
+    def __init__(self):
+        self._entries = SkipList()
+        self._keys = {}  # username -> clé courante dans la skip list
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.version = 0  # incrémentée à chaque changement du classement
+
+    @staticmethod
+    def _make_key(username, level, experience):
+        # Valeurs négatives pour trier par ordre décroissant, nom pour départager
+        return (-experience, -level, username)
+
+    @staticmethod
+    def _to_entry(key, rank=None):
+        entry = {
+            'username': key[2],
+            'level': -key[1],
+            'xp': -key[0],
+            'score': -key[0]
+        }
+        if rank is not None:
+            entry['rank'] = rank
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rebuild(self, rows):
+        """Reconstruire le classement à partir de (username, level, experience)"""
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            for username, level, experience in rows:
+                key = self._make_key(username, level, experience)
+                self._entries.insert(key)
+                self._keys[username] = key
+            self.loaded = True
+            self.version += 1
+
+    def update(self, username, level, experience):
+        """Insérer ou repositionner un joueur en O(log n)"""
+        key = self._make_key(username, level, experience)
+        with self._lock:
+            old_key = self._keys.get(username)
+            if old_key == key:
+                return
+            if old_key is not None:
+                self._entries.remove(old_key)
+            self._entries.insert(key)
+            self._keys[username] = key
+            self.version += 1
+
+    def remove(self, username):
+        """Retirer un joueur du classement"""
+        with self._lock:
+            old_key = self._keys.pop(username, None)
+            if old_key is not None:
+                self._entries.remove(old_key)
+                self.version += 1
+
+    def top(self, limit=50):
+        """Les `limit` meilleurs joueurs"""
+        with self._lock:
+            keys = self._entries.first(limit)
+        return [self._to_entry(key) for key in keys]
+
+    def rank(self, username):
+        """Position d'un joueur dans le classement, ou None s'il n'y figure pas"""
+        with self._lock:
+            key = self._keys.get(username)
+            if key is None:
+                return None
+            return self._to_entry(key, self._entries.rank(key))
+
+    def around(self, username, radius=5):
+        """Les joueurs classés jusqu'à `radius` places au-dessus et en dessous"""
+        with self._lock:
+            key = self._keys.get(username)
+            if key is None:
+                return None
+            rank = self._entries.rank(key)
+            start = max(1, rank - radius)
+            keys = self._entries.slice(start, rank + radius - start + 1)
+        return [self._to_entry(k, start + i) for i, k in enumerate(keys)]
+
+
+# Instance globale du classement
+leaderboard = Leaderboard()
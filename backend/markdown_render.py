@@ -0,0 +1,226 @@
+"""
+Rendu Markdown -> HTML des leçons (sous-ensemble du Markdown, sortie sûre) et cache des rendus
+"""
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+
+RENDER_CACHE_SIZE = 256
+
+# Tout le texte est échappé avant la mise en forme : seules les balises
+# produites ici peuvent apparaître dans le HTML, sans attribut fourni par l'auteur
+# à part des URL de liens filtrées.
+_HEADING = re.compile(r'^(#{1,6})\s+(.*?)(?:\s+#+)?\s*$')  # dièses fermants seulement après un espace
+_UL_ITEM = re.compile(r'^\s*[-*+]\s+(.*)$')
+_OL_ITEM = re.compile(r'^\s*\d+[.)]\s+(.*)$')
+_HR = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+_FENCE = re.compile(r'^\s*(```|~~~)\s*([\w+-]*)')
+_INLINE_CODE = re.compile(r'`([^`]+)`')
+_BOLD = re.compile(r'\*\*(.+?)\*\*|__(.+?)__')
+_ITALIC = re.compile(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])')
+# URL avec un niveau de parenthèses équilibrées (ex. https://fr.wikipedia.org/wiki/Foo_(bar)) ;
+# jamais de \x00 : un code mis de côté finirait dans l'attribut href
+_LINK = re.compile(r'\[([^\]]+)\]\(((?:[^()\s\x00]|\([^()\s\x00]*\))+)\)')
+_SAFE_URL = re.compile(r'^(https?://|mailto:|/|#)', re.IGNORECASE)
+_SECTION = re.compile(r'^## ', re.MULTILINE)
+_MARKUP = re.compile(r'```\w*|[#*_`>|]+|^\s*[-+]\s+|!?\[([^\]]*)\]\([^)]*\)', re.MULTILINE)
+_SPACES = re.compile(r'\s+')
+
+# Classes déjà stylées par le lecteur de cours du frontend
+CLASSES = {
+    'h1': 'content-h1', 'h2': 'content-h2', 'h3': 'content-h3',
+    'p': 'content-p', 'li': 'content-li',
+}
+
+
+def _open(tag):
+    css = CLASSES.get(tag)
+    return f'<{tag} class="{css}">' if css else f'<{tag}>'
+
+
+def _emphasis(text):
+    text = _BOLD.sub(lambda m: f'<strong>{m.group(1) or m.group(2)}</strong>', text)
+    return _ITALIC.sub(r'<em>\1</em>', text)
+
+
+def _inline(text):
+    """Mise en forme d'une ligne : échappement puis code, liens, gras, italique"""
+    # Code et liens déjà produits sont mis de côté : l'emphase ne doit toucher ni
+    # leur contenu ni les attributs href
+    stashed = []
+    text = text.replace('\x00', '')
+
+    def stash(fragment):
+        stashed.append(fragment)
+        return f'\x00{len(stashed) - 1}\x00'
+
+    text = _INLINE_CODE.sub(lambda m: stash(f'<code>{html.escape(m.group(1))}</code>'), text)
+    text = html.escape(text)
+
+    def link(match):
+        label, url = _emphasis(match.group(1)), html.unescape(match.group(2))
+        if not _SAFE_URL.match(url):
+            return label
+        return stash(f'<a href="{html.escape(url, quote=True)}" rel="noopener noreferrer">{label}</a>')
+
+    text = _emphasis(_LINK.sub(link, text))
+    # Un lien peut contenir du code mis de côté avant lui : remplacer jusqu'à stabilité
+    while '\x00' in text:
+        text = re.sub(r'\x00(\d+)\x00', lambda m: stashed[int(m.group(1))], text)
+    return text
+
+
+def render(markdown):
+    """Convertir du Markdown (titres, listes, code, citations, emphase, liens) en HTML sûr"""
+    out = []
+    paragraph = []
+    list_tag = None
+    lines = markdown.replace('\r\n', '\n').split('\n')
+    i = 0
+
+    def flush_paragraph():
+        if paragraph:
+            out.append(_open('p') + '<br>'.join(_inline(line) for line in paragraph) + '</p>')
+            paragraph.clear()
+
+    def close_list():
+        nonlocal list_tag
+        if list_tag:
+            out.append(f'</{list_tag}>')
+            list_tag = None
+
+    while i < len(lines):
+        line = lines[i]
+        fence = _FENCE.match(line)
+        if fence:
+            flush_paragraph()
+            close_list()
+            marker, lang = fence.group(1), fence.group(2)
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(marker):
+                code.append(lines[i])
+                i += 1
+            css = f' class="language-{html.escape(lang, quote=True)}"' if lang else ''
+            out.append(f'<pre><code{css}>{html.escape(chr(10).join(code))}</code></pre>')
+            i += 1
+            continue
+
+        if not line.strip():
+            flush_paragraph()
+            close_list()
+            i += 1
+            continue
+
+        heading = _HEADING.match(line)
+        ul_item = _UL_ITEM.match(line)
+        ol_item = _OL_ITEM.match(line)
+        if heading:
+            flush_paragraph()
+            close_list()
+            tag = f'h{len(heading.group(1))}'
+            out.append(f'{_open(tag)}{_inline(heading.group(2))}</{tag}>')
+        elif _HR.match(line):
+            flush_paragraph()
+            close_list()
+            out.append('<hr>')
+        elif ul_item or ol_item:
+            flush_paragraph()
+            tag = 'ul' if ul_item else 'ol'
+            if list_tag != tag:
+                close_list()
+                out.append(f'<{tag}>')
+                list_tag = tag
+            out.append(f'{_open("li")}{_inline((ul_item or ol_item).group(1))}</li>')
+        elif line.lstrip().startswith('>'):
+            flush_paragraph()
+            close_list()
+            quoted = []
+            while i < len(lines) and lines[i].lstrip().startswith('>'):
+                quoted.append(lines[i].lstrip()[1:].lstrip())
+                i += 1
+            out.append(f'<blockquote>{render(chr(10).join(quoted))}</blockquote>')
+            continue
+        else:
+            close_list()
+            paragraph.append(line.strip())
+        i += 1
+
+    flush_paragraph()
+    close_list()
+    return '\n'.join(out)
+
+
+def plain_text(markdown):
+    """Texte brut d'un Markdown (sans balisage, espaces réduits), pour les extraits de recherche"""
+    text = _MARKUP.sub(lambda m: f' {m.group(1)} ' if m.group(1) else ' ', markdown)
+    return _SPACES.sub(' ', text).strip()
+
+
+def split_sections(markdown):
+    """Découper aux titres de niveau 2 (## en début de ligne) : [(titre, markdown)]"""
+    sections = []
+    starts = [m.start() for m in _SECTION.finditer(markdown)]
+    if not starts or starts[0] > 0:
+        starts.insert(0, 0)
+    for index, start in enumerate(starts):
+        end = starts[index + 1] if index + 1 < len(starts) else len(markdown)
+        chunk = markdown[start:end]
+        if not chunk.strip():
+            continue
+        first_line = chunk.split('\n', 1)[0]
+        title = first_line[3:].strip() if first_line.startswith('## ') else ''
+        sections.append((title, chunk))
+    return sections
+
+
+class RenderCache:
+    """Rendus HTML indexés par empreinte du Markdown source.
+
+    Une leçon inchangée garde la même empreinte : après une modification de
+    module, seules les leçons dont le texte a changé sont rendues à nouveau.
+    """
+
+    def __init__(self, max_entries=RENDER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # empreinte -> {"html", "sections"}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._renders = 0
+
+    @staticmethod
+    def digest(markdown):
+        return hashlib.blake2b(markdown.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, markdown):
+        """HTML complet et sections [{title, html}] d'un texte Markdown"""
+        key = self.digest(markdown)
+        with self._lock:
+            rendered = self._entries.get(key)
+            if rendered is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return rendered
+
+        rendered = {
+            "html": render(markdown),
+            "sections": [{"title": title, "html": render(chunk)} for title, chunk in split_sections(markdown)]
+        }
+        with self._lock:
+            self._renders += 1
+            self._entries[key] = rendered
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def stats(self):
+        """Rendus en cache, réutilisations et rendus effectués"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "renders": self._renders
+            }
@@ -0,0 +1,36 @@
+"""
+Mesures de latence sur une fenêtre glissante (exposées par /api/health)
+"""
+import threading
+from collections import deque
+
+LATENCY_WINDOW = 1000  # dernières mesures conservées pour les percentiles
+
+
+class LatencyRecorder:
+    """Dernières durées mesurées (ms) et leurs percentiles"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def record(self, ms):
+        with self._lock:
+            self._samples.append(ms)
+            self._count += 1
+
+    def summary(self):
+        """Nombre total de mesures et avg/p50/p95/max sur la fenêtre"""
+        with self._lock:
+            ordered = sorted(self._samples)
+            count = self._count
+        if not ordered:
+            return {"count": count, "avg": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "count": count,
+            "avg": round(sum(ordered) / len(ordered), 2),
+            "p50": round(ordered[len(ordered) // 2], 2),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+            "max": round(ordered[-1], 2)
+        }
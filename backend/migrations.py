@@ -0,0 +1,246 @@
+"""
+Migrations versionnées du schéma SQLite et import en masse des utilisateurs
+"""
+import json
+from datetime import datetime
+
+# Index secondaires recréés après un import en masse (création différée)
+SECONDARY_INDEXES = {
+    'idx_users_leaderboard': '''
+        CREATE INDEX idx_users_leaderboard
+        ON users (is_admin, experience DESC, level DESC, username)
+    ''',
+    'idx_module_completions_item': 'CREATE INDEX idx_module_completions_item ON module_completions (module_id)',
+    'idx_quiz_completions_item': 'CREATE INDEX idx_quiz_completions_item ON quiz_completions (quiz_id)',
+    'idx_sessions_username': 'CREATE INDEX idx_sessions_username ON sessions (username)',
+    'idx_sessions_expires': 'CREATE INDEX idx_sessions_expires ON sessions (expires_at)',
+}
+
+
+def _table_exists(conn, table):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+def _create_index(conn, name):
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone():
+        conn.execute(SECONDARY_INDEXES[name])
+
+
+# ===================================
+# ÉTAPES DE MIGRATION
+# ===================================
+# Chaque étape doit rester valable sur une base créée avant le suivi des
+# versions (ancien init_database.py) : d'où les vérifications d'existence.
+
+def _initial_schema(conn):
+    """Tables users et progress_history"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            level INTEGER DEFAULT 1,
+            experience INTEGER DEFAULT 0,
+            is_admin INTEGER DEFAULT 0,
+            progress TEXT DEFAULT '{}',
+            completed_modules TEXT DEFAULT '[]',
+            completed_quizzes TEXT DEFAULT '[]'
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS progress_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            level INTEGER,
+            experience INTEGER,
+            action TEXT,
+            timestamp TEXT NOT NULL,
+            FOREIGN KEY (username) REFERENCES users(username)
+        )
+    ''')
+
+
+def _leaderboard_index(conn):
+    """Index couvrant pour la reconstruction du classement"""
+    _create_index(conn, 'idx_users_leaderboard')
+
+
+def _previous_values(conn):
+    """Colonnes previous_level / previous_experience renvoyées par RETURNING"""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(users)')}
+    for column in ('previous_level', 'previous_experience'):
+        if column not in columns:
+            conn.execute(f'ALTER TABLE users ADD COLUMN {column} INTEGER')
+
+
+def _completion_tables(conn):
+    """Tables de complétion normalisées, reprises des colonnes JSON de users"""
+    for table, column, legacy_column in (
+        ('module_completions', 'module_id', 'completed_modules'),
+        ('quiz_completions', 'quiz_id', 'completed_quizzes'),
+    ):
+        if _table_exists(conn, table):
+            continue
+        conn.execute(f'''
+            CREATE TABLE {table} (
+                username TEXT NOT NULL,
+                {column} TEXT NOT NULL,
+                completed_at TEXT NOT NULL,
+                PRIMARY KEY (username, {column})
+            ) WITHOUT ROWID
+        ''')
+        conn.execute(f'''
+            INSERT OR IGNORE INTO {table} (username, {column}, completed_at)
+            SELECT username, item, created_at FROM (
+                SELECT u.username, u.created_at,
+                       CAST(CASE WHEN j.type = 'object' THEN json_extract(j.value, '$.id') ELSE j.value END AS TEXT) AS item
+                FROM users u, json_each(CASE WHEN json_valid(u.{legacy_column}) THEN u.{legacy_column} ELSE '[]' END) j
+            )
+            WHERE item IS NOT NULL AND item != ''
+        ''')
+        # Pour les agrégats du type "combien d'utilisateurs ont terminé X"
+        _create_index(conn, f'idx_{table}_item')
+
+
+def _sessions_table(conn):
+    """Sessions persistantes (empreinte du token, jamais le token lui-même)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    _create_index(conn, 'idx_sessions_username')
+    _create_index(conn, 'idx_sessions_expires')
+
+
+def _session_revocations(conn):
+    """Révocations partagées des tokens signés (utilisateurs supprimés)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS session_revocations (
+            username TEXT PRIMARY KEY,
+            revoked_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+
+# Liste ordonnée : (version, nom, fonction). Ne jamais modifier une étape publiée,
+# ajouter une nouvelle version à la fin.
+MIGRATIONS = [
+    (1, 'schéma initial', _initial_schema),
+    (2, 'index du classement', _leaderboard_index),
+    (3, 'valeurs précédentes pour RETURNING', _previous_values),
+    (4, 'tables de complétion', _completion_tables),
+    (5, 'sessions persistantes', _sessions_table),
+    (6, 'révocations des tokens signés', _session_revocations),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    """Version du schéma appliquée à la base (0 si aucune)"""
+    if not _table_exists(conn, 'schema_version'):
+        return 0
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def migrate(conn, target=LATEST_VERSION):
+    """Appliquer dans l'ordre les migrations manquantes, chacune dans sa transaction"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version > target:
+            break
+        # BEGIN IMMEDIATE : un seul processus migre, les autres attendent puis revérifient
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if current_version(conn) >= version:
+                conn.rollback()
+                continue
+            step(conn)
+            conn.execute(
+                'INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)',
+                (version, name, datetime.now().isoformat())
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+        print(f"✅ [MIGRATION] v{version} appliquée: {name}")
+    return applied
+
+
+def import_users(conn, users_data):
+    """Importer un export users_db.json en une seule transaction.
+
+    Les lignes sont insérées avec executemany ; les index secondaires sont
+    supprimés puis recréés une seule fois à la fin. Les utilisateurs déjà
+    présents sont ignorés. Retourne le nombre d'utilisateurs ajoutés.
+    """
+    now = datetime.now().isoformat()
+    user_rows = []
+    completion_rows = {'module_completions': [], 'quiz_completions': []}
+
+    for username, user_data in users_data.items():
+        created_at = user_data.get('created_at', now)
+        user_rows.append((
+            username,
+            user_data.get('email', ''),
+            user_data.get('password', ''),
+            created_at,
+            user_data.get('level', 1),
+            user_data.get('experience', 0),
+            1 if user_data.get('is_admin', False) else 0,
+            json.dumps(user_data.get('progress', {}))
+        ))
+        for table, key in (('module_completions', 'completed_modules'), ('quiz_completions', 'completed_quizzes')):
+            for item in user_data.get(key, []):
+                if isinstance(item, dict):
+                    item = item.get('id')
+                if item is not None and item != '':
+                    completion_rows[table].append((username, str(item), created_at))
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for name in SECONDARY_INDEXES:
+            conn.execute(f'DROP INDEX IF EXISTS {name}')
+
+        before = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+        conn.executemany('''
+            INSERT OR IGNORE INTO users (username, email, password, created_at, level, experience, is_admin, progress)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', user_rows)
+        added = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0] - before
+
+        conn.executemany(
+            'INSERT OR IGNORE INTO module_completions (username, module_id, completed_at) VALUES (?, ?, ?)',
+            completion_rows['module_completions']
+        )
+        conn.executemany(
+            'INSERT OR IGNORE INTO quiz_completions (username, quiz_id, completed_at) VALUES (?, ?, ?)',
+            completion_rows['quiz_completions']
+        )
+
+        for name in SECONDARY_INDEXES:
+            conn.execute(SECONDARY_INDEXES[name])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return added
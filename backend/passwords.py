@@ -0,0 +1,161 @@
+"""
+Hachage des mots de passe (PBKDF2-SHA256) sur un pool de threads borné
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from metrics import LatencyRecorder
+
+ALGORITHM = 'pbkdf2_sha256'
+ITERATIONS = int(os.environ.get('CYBERFORGE_PBKDF2_ITERATIONS', 600000))
+SALT_BYTES = 16
+HASH_WORKERS = int(os.environ.get('CYBERFORGE_HASH_WORKERS', max(1, min(4, (os.cpu_count() or 1)))))
+HASH_MAX_PENDING = int(os.environ.get('CYBERFORGE_HASH_MAX_PENDING', 64))
+HASH_TIMEOUT = float(os.environ.get('CYBERFORGE_HASH_TIMEOUT', 10))
+
+
+class HasherBusy(Exception):
+    """File d'attente pleine ou délai dépassé : réessayer plus tard"""
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _is_legacy(encoded):
+    # Ancien format : SHA-256 hexadécimal sans sel
+    return len(encoded) == 64 and '$' not in encoded
+
+
+def encode_password(password, iterations=ITERATIONS, salt=None):
+    """Empreinte au format pbkdf2_sha256$itérations$sel$hash"""
+    salt = salt or secrets.token_bytes(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return f"{ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+def check_password(password, encoded):
+    """Vérifier un mot de passe. Retourne (valide, nouvelle_empreinte ou None).
+
+    Une nouvelle empreinte est calculée quand l'ancienne est au format SHA-256
+    historique ou utilise moins d'itérations que la configuration actuelle.
+    """
+    if not encoded:
+        return False, None
+    if _is_legacy(encoded):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        if not hmac.compare_digest(legacy, encoded):
+            return False, None
+        return True, encode_password(password)
+
+    try:
+        algorithm, iterations, salt, expected = encoded.split('$')
+        iterations = int(iterations)
+    except ValueError:
+        return False, None
+    if algorithm != ALGORITHM:
+        return False, None
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), _unb64(salt), iterations)
+    if not hmac.compare_digest(digest, _unb64(expected)):
+        return False, None
+    return True, encode_password(password) if iterations < ITERATIONS else None
+
+
+class PasswordHasher:
+    """Exécute les calculs PBKDF2 sur un nombre limité de threads.
+
+    Les calculs ne monopolisent ainsi pas les threads des requêtes et des
+    événements Socket.IO lors d'une rafale de connexions. Au-delà de
+    `max_pending` calculs en attente, ou si le résultat n'arrive pas en
+    `timeout` secondes, HasherBusy est levée.
+    """
+
+    def __init__(self, workers=HASH_WORKERS, max_pending=HASH_MAX_PENDING, timeout=HASH_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hasher')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._wait_ms = LatencyRecorder()
+        self._hash_ms = LatencyRecorder()
+
+    def _run(self, fn, args, queued_at):
+        started = time.perf_counter()
+        with self._lock:
+            self._pending -= 1
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+            self._wait_ms.record((started - queued_at) * 1000)
+            self._hash_ms.record((finished - started) * 1000)
+            self._slots.release()
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HasherBusy("Trop de calculs de mot de passe en attente")
+        with self._lock:
+            self._pending += 1
+        future = self._executor.submit(self._run, fn, args, time.perf_counter())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Encore en file : on l'annule et on libère sa place nous-mêmes
+            if future.cancel():
+                with self._lock:
+                    self._pending -= 1
+                self._slots.release()
+            with self._lock:
+                self._timeouts += 1
+            raise HasherBusy("Délai de calcul du mot de passe dépassé")
+
+    def hash(self, password):
+        """Empreinte d'un nouveau mot de passe"""
+        return self._submit(encode_password, password)
+
+    def verify(self, password, encoded):
+        """Vérification (et éventuelle nouvelle empreinte) : voir check_password"""
+        return self._submit(check_password, password, encoded)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """Profondeur de file et latences (ms) du hachage"""
+        with self._lock:
+            counters = {
+                "algorithm": ALGORITHM,
+                "iterations": ITERATIONS,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "queue_depth": self._pending,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts
+            }
+        counters["queue_wait_ms"] = self._wait_ms.summary()
+        counters["hash_ms"] = self._hash_ms.summary()
+        return counters
@@ -0,0 +1,206 @@
+"""
+Synchronisation de la progression : écritures inutiles ignorées et regroupées par utilisateur
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Complétions ajoutées sans jamais être retirées : fusionnées par union, pas remplacées
+COMPLETION_FIELDS = ('completed_modules', 'completed_quizzes')
+DEBOUNCE_WINDOW = float(os.environ.get('CYBERFORGE_PROGRESS_DEBOUNCE', 0.25))  # secondes
+SLOT_CACHE_SIZE = 4096  # utilisateurs dont l'état de synchronisation est gardé
+SLOT_TTL = 600.0        # secondes sans synchronisation avant d'oublier un utilisateur
+
+
+class _Batch:
+    """Mises à jour d'un utilisateur fusionnées en une seule écriture"""
+
+    __slots__ = ('payload', 'done', 'result', 'error')
+
+    def __init__(self):
+        self.payload = {}
+        self.done = False
+        self.result = None
+        self.error = None
+
+    def merge(self, payload):
+        # Les champs absents (None) ne modifient pas la valeur précédente ;
+        # niveau, XP et progression : la dernière valeur gagne
+        for field, value in payload.items():
+            if value is None:
+                continue
+            previous = self.payload.get(field)
+            if field in COMPLETION_FIELDS and isinstance(previous, list) and isinstance(value, list):
+                # Union dans l'ordre d'arrivée : aucune complétion d'un appel regroupé n'est perdue
+                value = previous + [item for item in value if item not in previous]
+            self.payload[field] = value
+
+
+class _UserSlot:
+    """État de synchronisation d'un utilisateur"""
+
+    __slots__ = ('cond', 'digest', 'snapshot', 'open_batch', 'writing', 'users', 'expires_at')
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.digest = None      # empreinte du dernier contenu écrit
+        self.snapshot = None    # résultat de la dernière écriture
+        self.open_batch = None  # lot en attente, pas encore pris par un écrivain
+        self.writing = False
+        self.users = 0          # appels en cours (protégé par le verrou de ProgressSync)
+        self.expires_at = 0.0
+
+
+class ProgressSync:
+    """Filtre les synchronisations identiques et regroupe les écritures rapprochées.
+
+    Une mise à jour identique à la dernière écrite est ignorée sans accès à la base.
+    Sinon, le premier appel ouvre un lot et attend `debounce` secondes (puis la fin
+    d'une écriture en cours) avant de l'écrire : les mises à jour du même
+    utilisateur arrivées entre-temps (plusieurs onglets, sauvegardes en rafale) y
+    sont fusionnées et une seule écriture est faite. Les synchronisations
+    périodiques, plus espacées que la fenêtre, restent chacune une écriture si
+    leur contenu change.
+
+    L'état par utilisateur est gardé en LRU (`max_size`) et expire après `ttl`
+    secondes sans synchronisation ; un état en cours d'utilisation n'est jamais retiré.
+    """
+
+    def __init__(self, writer, debounce=DEBOUNCE_WINDOW, max_size=SLOT_CACHE_SIZE, ttl=SLOT_TTL):
+        self._writer = writer  # writer(username, **champs) -> dict ou None
+        self.debounce = debounce
+        self.max_size = max_size
+        self.ttl = ttl
+        self._slots = OrderedDict()  # username -> _UserSlot, du moins au plus récent
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._skipped = 0
+        self._coalesced = 0
+        self._written = 0
+        self._evictions = 0
+
+    @staticmethod
+    def digest(payload):
+        """Empreinte compacte du contenu d'une mise à jour"""
+        data = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.blake2b(data.encode('utf-8'), digest_size=16).digest()
+
+    def _acquire(self, username):
+        """État de l'utilisateur, réservé jusqu'à _release()"""
+        now = time.monotonic()
+        with self._lock:
+            slot = self._slots.get(username)
+            if slot is not None and slot.expires_at <= now and slot.users == 0:
+                # Expiré : le dernier résultat a pu être modifié ailleurs depuis
+                del self._slots[username]
+                self._evictions += 1
+                slot = None
+            if slot is None:
+                slot = self._slots[username] = _UserSlot()
+            slot.users += 1
+            slot.expires_at = now + self.ttl
+            self._slots.move_to_end(username)
+            if len(self._slots) > self.max_size:
+                excess = len(self._slots) - self.max_size
+                idle = [name for name, other in self._slots.items() if other.users == 0][:excess]
+                for name in idle:
+                    del self._slots[name]
+                self._evictions += len(idle)
+            return slot
+
+    def _release(self, slot):
+        with self._lock:
+            slot.users -= 1
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def submit(self, username, payload):
+        """Appliquer une mise à jour. Retourne (résultat, écrit_par_cet_appel)"""
+        payload = {k: v for k, v in payload.items() if v is not None}
+        self._count('_submitted')
+        slot = self._acquire(username)
+        try:
+            return self._submit(slot, username, payload)
+        finally:
+            self._release(slot)
+
+    def _submit(self, slot, username, payload):
+        with slot.cond:
+            # Rien de neuf : servir le dernier résultat sans toucher à la base
+            if slot.open_batch is None and not slot.writing and slot.snapshot is not None \
+                    and self.digest(payload) == slot.digest:
+                self._count('_skipped')
+                return slot.snapshot, False
+
+            batch = slot.open_batch
+            if batch is not None:
+                # Lot déjà ouvert : son écrivain écrira aussi notre contenu
+                batch.merge(payload)
+                while not batch.done:
+                    slot.cond.wait()
+                self._count('_coalesced')
+                if batch.error is not None:
+                    raise batch.error
+                return batch.result, False
+
+            # Cet appel ouvre le lot et l'écrira : fenêtre de regroupement, puis
+            # attente de l'écriture précédente (les écritures restent dans l'ordre)
+            batch = slot.open_batch = _Batch()
+            batch.merge(payload)
+            deadline = time.monotonic() + self.debounce
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and not slot.writing:
+                    break
+                slot.cond.wait(remaining if remaining > 0 else None)
+            slot.open_batch = None
+            digest = self.digest(batch.payload)
+            if digest == slot.digest and slot.snapshot is not None:
+                batch.done = True
+                batch.result = slot.snapshot
+                slot.cond.notify_all()
+                self._count('_skipped')
+                return slot.snapshot, False
+            slot.writing = True
+
+        try:
+            batch.result = self._writer(username, **batch.payload)
+        except Exception as e:
+            batch.error = e
+        finally:
+            with slot.cond:
+                batch.done = True
+                slot.writing = False
+                if batch.error is None and batch.result is not None:
+                    slot.digest = digest
+                    slot.snapshot = batch.result
+                slot.cond.notify_all()
+
+        if batch.error is not None:
+            raise batch.error
+        self._count('_written')
+        return batch.result, True
+
+    def forget(self, username):
+        """Oublier l'état d'un utilisateur (suppression de compte)"""
+        with self._lock:
+            self._slots.pop(username, None)
+
+    def stats(self):
+        """Compteurs de synchronisation"""
+        with self._lock:
+            return {
+                "users": len(self._slots),
+                "max_users": self.max_size,
+                "debounce_s": self.debounce,
+                "evictions": self._evictions,
+                "submitted": self._submitted,
+                "written": self._written,
+                "skipped": self._skipped,
+                "coalesced": self._coalesced
+            }
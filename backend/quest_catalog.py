@@ -0,0 +1,177 @@
+"""
+Catalogue des quêtes (quests/*.json) gardé en mémoire et revalidé par mtime/taille
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+QUESTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quests')
+REVALIDATE_INTERVAL = float(os.environ.get('CYBERFORGE_QUEST_REVALIDATE_INTERVAL', 2.0))
+_SAFE_NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+class _Entry:
+    """Quête chargée et signature du fichier au moment de la lecture"""
+
+    __slots__ = ('signature', 'questions', 'error', 'version')
+
+    def __init__(self, signature, questions, error, version):
+        self.signature = signature  # (mtime_ns, taille)
+        self.questions = questions
+        self.error = error
+        self.version = version
+
+
+class QuestCatalog:
+    """Quêtes indexées par identifiant, lues une fois puis servies depuis la mémoire.
+
+    Le répertoire est revalidé (un stat par fichier, relecture des seuls
+    fichiers modifiés) au plus une fois par `revalidate_interval` secondes,
+    pour prendre en compte les modifications faites hors de l'application.
+    Les écritures via save() / delete() mettent le catalogue à jour aussitôt.
+    """
+
+    def __init__(self, root=QUESTS_DIR, revalidate_interval=REVALIDATE_INTERVAL):
+        self.root = root
+        self.revalidate_interval = revalidate_interval
+        self._entries = {}  # quest_id -> _Entry
+        self._lock = threading.RLock()
+        self._next_check = 0.0
+        self._version = 0   # incrémentée à chaque changement du catalogue
+        self._reloads = 0
+
+    def _path(self, quest_id):
+        return os.path.join(self.root, f'{quest_id}.json')
+
+    @staticmethod
+    def validate_id(quest_id):
+        if not isinstance(quest_id, str) or not _SAFE_NAME.match(quest_id):
+            raise ValueError("Invalid quiz id")
+
+    def _load(self, quest_id, signature):
+        """Lire un fichier de quête (appelé avec le verrou)"""
+        questions, error = None, None
+        try:
+            with open(self._path(quest_id), 'r', encoding='utf-8') as f:
+                questions = json.load(f)
+        except Exception as e:
+            error = e
+            print(f"Error loading {quest_id}.json: {e}")
+        self._version += 1
+        self._reloads += 1
+        self._entries[quest_id] = _Entry(signature, questions, error, self._version)
+
+    def _revalidate(self):
+        """Synchroniser avec le répertoire si l'intervalle est écoulé (appelé avec le verrou)"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.revalidate_interval
+
+        seen = set()
+        if os.path.isdir(self.root):
+            with os.scandir(self.root) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.endswith('.json') or not dir_entry.is_file():
+                        continue
+                    quest_id = dir_entry.name[:-len('.json')]
+                    stat = dir_entry.stat()
+                    signature = (stat.st_mtime_ns, stat.st_size)
+                    seen.add(quest_id)
+                    entry = self._entries.get(quest_id)
+                    if entry is None or entry.signature != signature:
+                        self._load(quest_id, signature)
+        for quest_id in set(self._entries) - seen:
+            del self._entries[quest_id]
+            self._version += 1
+
+    def invalidate(self):
+        """Forcer une revalidation complète au prochain accès"""
+        with self._lock:
+            self._next_check = 0.0
+
+    @property
+    def version(self):
+        with self._lock:
+            self._revalidate()
+            return self._version
+
+    def __contains__(self, quest_id):
+        with self._lock:
+            self._revalidate()
+            return quest_id in self._entries
+
+    def __len__(self):
+        with self._lock:
+            self._revalidate()
+            return len(self._entries)
+
+    def items(self):
+        """(quest_id, questions) des quêtes lisibles, triées par identifiant"""
+        with self._lock:
+            self._revalidate()
+            return [(qid, self._entries[qid].questions)
+                    for qid in sorted(self._entries) if self._entries[qid].error is None]
+
+    def get(self, quest_id):
+        """Questions d'une quête, None si absente ; relève l'erreur si le fichier est invalide"""
+        with self._lock:
+            self._revalidate()
+            entry = self._entries.get(quest_id)
+        if entry is None:
+            return None
+        if entry.error is not None:
+            raise entry.error
+        return entry.questions
+
+    def quest_version(self, quest_id):
+        """Version de la dernière lecture d'une quête (None si absente)"""
+        with self._lock:
+            self._revalidate()
+            entry = self._entries.get(quest_id)
+            return entry.version if entry is not None else None
+
+    def save(self, quest_id, questions):
+        """Écrire une quête sur disque et dans le catalogue"""
+        self.validate_id(quest_id)
+        path = self._path(quest_id)
+        text = json.dumps(questions, ensure_ascii=False, indent=2)
+        with self._lock:
+            # Brouillon à nom unique : un autre processus peut écrire la même quête
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f'{os.path.basename(path)}.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(tmp, path)
+            except BaseException:
+                os.remove(tmp)
+                raise
+            stat = os.stat(path)
+            # Copie indépendante de l'objet reçu, identique à une relecture du fichier
+            self._version += 1
+            self._entries[quest_id] = _Entry((stat.st_mtime_ns, stat.st_size), json.loads(text), None, self._version)
+
+    def delete(self, quest_id):
+        """Supprimer une quête ; False si elle n'existe pas"""
+        self.validate_id(quest_id)
+        with self._lock:
+            path = self._path(quest_id)
+            if not os.path.exists(path):
+                return False
+            os.remove(path)
+            if self._entries.pop(quest_id, None) is not None:
+                self._version += 1
+            return True
+
+    def stats(self):
+        """Taille du catalogue et nombre de relectures de fichiers"""
+        with self._lock:
+            return {
+                "quests": len(self._entries),
+                "version": self._version,
+                "reloads": self._reloads,
+                "revalidate_interval_s": self.revalidate_interval
+            }
@@ -0,0 +1,264 @@
+"""
+Pack binaire des quêtes (quests/*.json compilés en un seul fichier) lu par mmap avec index d'offsets
+
+Format (entiers little-endian) :
+    en-tête      : magic "CFQP", version du format, réservé, nombre de quêtes, offset du répertoire
+    enregistrements : une question par enregistrement, JSON compact en UTF-8
+    tables       : par quête, (offset, longueur) de chacune de ses questions
+    répertoire   : par quête, longueur de l'identifiant, nombre de questions, offset de sa table,
+                   signature du fichier source (mtime_ns, taille), puis l'identifiant
+
+Les fichiers JSON restent la source : le pack est reconstruit quand l'un d'eux
+change, en recopiant tels quels les enregistrements des quêtes inchangées.
+
+Construction manuelle : python quest_pack.py
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from quest_catalog import QUESTS_DIR, REVALIDATE_INTERVAL
+
+PACK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quests.pack')
+MAGIC = b'CFQP'
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<4sHHIQ')    # magic, version, réservé, quêtes, offset du répertoire
+_ENTRY = struct.Struct('<QI')         # offset, longueur d'une question
+_DIRECTORY = struct.Struct('<HIQqQ')  # longueur de l'id, questions, offset de la table, mtime_ns, taille
+
+
+class _PackedQuest:
+    __slots__ = ('count', 'table', 'signature')
+
+    def __init__(self, count, table, signature):
+        self.count = count
+        self.table = table          # offset de la table (offset, longueur) des questions
+        self.signature = signature  # (mtime_ns, taille) du fichier JSON compilé
+
+
+def _source_signatures(root):
+    """quest_id -> (mtime_ns, taille) des fichiers JSON, un stat par fichier"""
+    signatures = {}
+    if os.path.isdir(root):
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.name.endswith('.json') and entry.is_file():
+                    stat = entry.stat()
+                    signatures[entry.name[:-len('.json')]] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+
+def _read_directory(buffer):
+    """Répertoire d'un pack -> {quest_id: _PackedQuest} ; ValueError si le fichier n'est pas un pack"""
+    if len(buffer) < _HEADER.size:
+        raise ValueError("Quest pack truncated")
+    magic, version, _, count, offset = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Not a quest pack (or unsupported format)")
+    quests = {}
+    for _ in range(count):
+        id_length, questions, table, mtime_ns, size = _DIRECTORY.unpack_from(buffer, offset)
+        offset += _DIRECTORY.size
+        quest_id = bytes(buffer[offset:offset + id_length]).decode('utf-8')
+        offset += id_length
+        quests[quest_id] = _PackedQuest(questions, table, (mtime_ns, size))
+    return quests
+
+
+def _write_pack(f, root, previous):
+    """Écrire le pack dans le fichier ouvert `f` ; retourne le nombre de quêtes recopiées"""
+    signatures = _source_signatures(root)
+    old_buffer, old_quests = previous if previous is not None else (None, {})
+    reused = 0
+    directory = []
+    f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0, 0))
+    for quest_id in sorted(signatures):
+        signature = signatures[quest_id]
+        old = old_quests.get(quest_id)
+        records = []
+        if old is not None and old.signature == signature:
+            for index in range(old.count):
+                start, length = _ENTRY.unpack_from(old_buffer, old.table + index * _ENTRY.size)
+                records.append(old_buffer[start:start + length])
+            reused += 1
+        else:
+            try:
+                with open(os.path.join(root, f'{quest_id}.json'), 'r', encoding='utf-8') as source:
+                    questions = json.load(source)
+            except Exception as e:
+                # Quête illisible : gardée vide, pour ne pas reconstruire le pack à chaque vérification
+                print(f"Error loading {quest_id}.json: {e}")
+                questions = []
+            records = [json.dumps(question, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                       for question in questions]
+
+        entries = []
+        for record in records:
+            entries.append((f.tell(), len(record)))
+            f.write(record)
+        table = f.tell()
+        for start, length in entries:
+            f.write(_ENTRY.pack(start, length))
+        directory.append((quest_id, len(entries), table, signature))
+
+    directory_offset = f.tell()
+    for quest_id, count, table, (mtime_ns, size) in directory:
+        encoded = quest_id.encode('utf-8')
+        f.write(_DIRECTORY.pack(len(encoded), count, table, mtime_ns, size))
+        f.write(encoded)
+    f.seek(0)
+    f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(directory), directory_offset))
+    return reused
+
+
+def build_pack(path, root=QUESTS_DIR, previous=None):
+    """Compiler les quêtes de `root` à côté de `path` ; `previous` = (buffer, répertoire) d'un ancien pack.
+
+    Retourne (fichier temporaire à renommer en `path`, nombre de quêtes
+    recopiées depuis l'ancien pack sans relire leur JSON). Le fichier temporaire
+    a un nom unique : plusieurs processus peuvent reconstruire en même temps.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f'{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            reused = _write_pack(f, root, previous)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return tmp, reused
+
+
+class QuestPack:
+    """Questions servies depuis le pack mappé en mémoire : question i de la quête q en O(1).
+
+    Seul le répertoire (une entrée par quête) est lu à l'ouverture ; une
+    question est lue en deux accès (son entrée de table, puis son
+    enregistrement) et seul son JSON est décodé. Les fichiers sources sont
+    revérifiés (un stat chacun) au plus une fois par `revalidate_interval`.
+    """
+
+    def __init__(self, path=PACK_PATH, root=QUESTS_DIR, revalidate_interval=REVALIDATE_INTERVAL):
+        self.path = path
+        self.root = root
+        self.revalidate_interval = revalidate_interval
+        self._file = None
+        self._map = None
+        self._quests = {}
+        self._lock = threading.Lock()        # lectures et remplacement du mapping
+        self._build_lock = threading.Lock()  # une seule reconstruction à la fois
+        self._next_check = 0.0
+        self._version = 0
+        self._rebuilds = 0
+        self._reused = 0
+        self._lookups = 0
+
+    def _close(self):
+        """Libérer le mapping courant (appelé avec le verrou)"""
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._map = self._file = None
+        self._quests = {}
+
+    def _open(self):
+        """Mapper le pack sur disque (appelé avec le verrou) ; False s'il est absent ou invalide"""
+        self._close()
+        try:
+            self._file = open(self.path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._quests = _read_directory(self._map)
+        except (OSError, ValueError, struct.error) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"⚠️ [QUEST PACK] Pack illisible, reconstruction: {e}")
+            self._close()
+            return False
+        self._version += 1
+        return True
+
+    def refresh(self, force=False):
+        """Reconstruire le pack si un fichier de quête a changé depuis sa construction"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now < self._next_check:
+                return
+            self._next_check = now + self.revalidate_interval
+            if self._map is None:
+                self._open()
+
+        with self._build_lock:
+            signatures = _source_signatures(self.root)
+            with self._lock:
+                current = {quest_id: quest.signature for quest_id, quest in self._quests.items()}
+            if self._map is not None and signatures == current:
+                return
+            # Seul ce verrou ferme l'ancien mapping : on peut y recopier sans bloquer les lectures
+            previous = (self._map, self._quests) if self._map is not None else None
+            try:
+                tmp, reused = build_pack(self.path, self.root, previous)
+            except OSError as e:
+                print(f"⚠️ [QUEST PACK] Reconstruction impossible, ancien pack conservé: {e}")
+                return
+            with self._lock:
+                # Fermer avant de remplacer : un fichier mappé ne peut pas être remplacé sous Windows
+                self._close()
+                try:
+                    os.replace(tmp, self.path)
+                except OSError as e:
+                    # Pack encore ouvert ailleurs (Windows) : nouvel essai à la prochaine vérification
+                    print(f"⚠️ [QUEST PACK] Remplacement impossible, ancien pack conservé: {e}")
+                    os.remove(tmp)
+                    self._open()
+                    return
+                self._open()
+                self._rebuilds += 1
+                self._reused += reused
+            print(f"📦 [QUEST PACK] {len(self._quests)} quêtes compilées ({reused} reprises telles quelles)")
+
+    @property
+    def version(self):
+        """Incrémentée à chaque (ré)ouverture du pack"""
+        self.refresh()
+        return self._version
+
+    def count(self, quest_id):
+        """Nombre de questions d'une quête (None si absente)"""
+        self.refresh()
+        with self._lock:
+            quest = self._quests.get(quest_id)
+            return quest.count if quest is not None else None
+
+    def question(self, quest_id, index):
+        """Question `index` (à partir de 0) d'une quête, ou None"""
+        self.refresh()
+        with self._lock:
+            quest = self._quests.get(quest_id)
+            if quest is None or not 0 <= index < quest.count:
+                return None
+            start, length = _ENTRY.unpack_from(self._map, quest.table + index * _ENTRY.size)
+            record = self._map[start:start + length]
+            self._lookups += 1
+        return json.loads(record)
+
+    def stats(self):
+        """Taille du pack, reconstructions et lectures"""
+        with self._lock:
+            return {
+                "quests": len(self._quests),
+                "questions": sum(quest.count for quest in self._quests.values()),
+                "bytes": len(self._map) if self._map is not None else 0,
+                "rebuilds": self._rebuilds,
+                "reused_quests": self._reused,
+                "lookups": self._lookups
+            }
+
+
+if __name__ == '__main__':
+    pack = QuestPack()
+    pack.refresh(force=True)
+    print(pack.stats())
@@ -0,0 +1,132 @@
+"""
+Limitation de débit en mémoire (token bucket) par IP et par utilisateur
+"""
+import functools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import jsonify, request
+
+RATE_LIMIT_ENABLED = os.environ.get('CYBERFORGE_RATE_LIMIT', '1') != '0'
+MAX_BUCKETS = 50000  # au-delà, les seaux les moins récemment utilisés sont oubliés
+
+# Budgets par route : clé -> (capacité, secondes pour regagner un jeton)
+ROUTE_LIMITS = {
+    'login': {'ip': (20, 3), 'user': (5, 12)},
+    'register': {'ip': (5, 60)},
+    'submit-flag': {'ip': (30, 2), 'user': (10, 6)},
+    'start-lab': {'ip': (5, 30), 'user': (2, 30)},
+}
+# Routes dont la clé utilisateur est le compte visé, lu dans le corps (pas encore de session)
+BODY_USER_ROUTES = frozenset({'login'})
+
+
+class RateLimiter:
+    """Seaux à jetons indexés par (route, type de clé, clé), vérifiés en O(1).
+
+    Un seau redevenu plein est équivalent à un seau absent : il est retiré
+    lors des vérifications suivantes, et le nombre total de seaux est borné
+    par `max_buckets` (les moins récemment utilisés sont oubliés en premier).
+
+    La clé utilisateur vient du token Bearer (résolu par `sessions`) ; sans
+    session valide, seule la limite par IP s'applique. Seule la connexion
+    utilise le `username` du corps : c'est le compte visé par les essais.
+    """
+
+    def __init__(self, sessions=None, limits=ROUTE_LIMITS, max_buckets=MAX_BUCKETS, enabled=RATE_LIMIT_ENABLED):
+        self._sessions = sessions
+        self.limits = limits
+        self.max_buckets = max_buckets
+        self.enabled = enabled
+        # (route, type, clé) -> [jetons, mis à jour à, plein à]
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._allowed = 0
+        self._limited = 0
+        self._evicted = 0
+
+    def _evict(self, now):
+        """Retirer les seaux pleins les plus anciens et respecter la borne (appelé avec le verrou)"""
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket[2] > now and len(self._buckets) <= self.max_buckets:
+                break
+            del self._buckets[key]
+            self._evicted += 1
+
+    def _tokens(self, key, capacity, interval, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return capacity
+        return min(capacity, bucket[0] + (now - bucket[1]) / interval)
+
+    def check(self, route, ip, user=None):
+        """Consommer un jeton pour chaque clé ; retourne l'attente (0 si autorisé)"""
+        limits = self.limits[route]
+        keys = [('ip', ip)]
+        if user and 'user' in limits:
+            keys.append(('user', user))
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            # Vérifier toutes les clés avant de consommer, pour ne rien débiter en cas de refus
+            wait = 0
+            for kind, value in keys:
+                capacity, interval = limits[kind]
+                tokens = self._tokens((route, kind, value), capacity, interval, now)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) * interval)
+            if wait:
+                self._limited += 1
+                return wait
+            for kind, value in keys:
+                capacity, interval = limits[kind]
+                key = (route, kind, value)
+                tokens = self._tokens(key, capacity, interval, now) - 1
+                self._buckets[key] = [tokens, now, now + (capacity - tokens) * interval]
+                self._buckets.move_to_end(key)
+            self._allowed += 1
+            return 0
+
+    def _user(self, route):
+        """Identité utilisée pour la limite par utilisateur, ou None"""
+        if route in BODY_USER_ROUTES:
+            data = request.get_json(silent=True)
+            user = data.get('username') if isinstance(data, dict) else None
+            return user if isinstance(user, str) else None
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or self._sessions is None:
+            return None
+        claims = self._sessions.get_claims(auth_header.replace('Bearer ', ''))
+        return claims["username"] if claims else None
+
+    def limit(self, route):
+        """Décorateur de route : 429 avec Retry-After quand un budget est épuisé"""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    wait = self.check(route, request.remote_addr, self._user(route))
+                    if wait:
+                        retry_after = max(1, math.ceil(wait))
+                        response = jsonify({"error": "Too many requests", "retry_after": retry_after})
+                        response.headers['Retry-After'] = str(retry_after)
+                        return response, 429
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """Seaux actifs et décisions"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "buckets": len(self._buckets),
+                "max_buckets": self.max_buckets,
+                "allowed": self._allowed,
+                "limited": self._limited,
+                "evicted": self._evicted
+            }
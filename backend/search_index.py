@@ -0,0 +1,186 @@
+"""
+Index inversé en mémoire (leçons et questions de quêtes) avec classement BM25 et extraits
+"""
+import bisect
+import heapq
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from metrics import LatencyRecorder
+from text_normalize import STOPWORDS, WORD, fold, stem, terms
+
+TITLE_WEIGHT = 3        # une occurrence dans le titre compte comme trois dans le corps
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_TERMS = 20   # termes du vocabulaire essayés pour le dernier mot tapé
+SNIPPET_BEFORE = 60
+SNIPPET_LENGTH = 180
+
+
+class _Document:
+    """Document indexé : champs renvoyés, longueur, texte et premières positions des termes"""
+
+    __slots__ = ('fields', 'length', 'text', 'positions')
+
+    def __init__(self, fields, length, text, positions):
+        self.fields = fields
+        self.length = length
+        self.text = text
+        self.positions = positions  # terme -> position de la première occurrence dans text
+
+
+def _first_positions(text):
+    positions = {}
+    for match in WORD.finditer(fold(text)):
+        if match.group() not in STOPWORDS:
+            positions.setdefault(stem(match.group()), match.start())
+    return positions
+
+
+def _snippet(document, matched):
+    """Extrait du texte autour de la première occurrence d'un terme trouvé"""
+    text = document.text
+    offsets = [document.positions[term] for term in matched if document.positions.get(term) is not None]
+    if not offsets:
+        return text[:SNIPPET_LENGTH] + ('…' if len(text) > SNIPPET_LENGTH else '')
+    start = max(0, min(offsets) - SNIPPET_BEFORE)
+    if start:
+        space = text.find(' ', start)
+        start = space + 1 if 0 <= space < min(offsets) else start
+    end = min(len(text), start + SNIPPET_LENGTH)
+    if end < len(text):
+        space = text.rfind(' ', start, end)
+        end = space if space > min(offsets) else end
+    return ('…' if start else '') + text[start:end] + ('…' if end < len(text) else '')
+
+
+class SearchIndex:
+    """Index inversé terme -> {document: fréquence pondérée}, mis à jour par groupe.
+
+    Un groupe (un module, une quête) porte une version : sync() ne réindexe
+    que les groupes dont la version a changé et retire ceux qui ont disparu.
+    Les recherches lisent l'index sous verrou pendant qu'un groupe est
+    reconstruit ; seule l'insertion finale le bloque.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(dict)  # terme -> {clé du document: fréquence}
+        self._documents = {}                # clé -> _Document
+        self._groups = {}                   # groupe -> (version, [clés])
+        self._total_length = 0
+        self._vocabulary = None             # termes triés (préfixes), reconstruits à la demande
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.source_version = None          # versions des sources lors du dernier sync()
+        self._latency = LatencyRecorder()
+        self._reindexed = 0
+
+    def _remove_group(self, group):
+        """Retirer les documents d'un groupe (appelé avec le verrou)"""
+        _, keys = self._groups.pop(group, (None, []))
+        for key in keys:
+            document = self._documents.pop(key)
+            self._total_length -= document.length
+            for term in document.positions:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(key, None)
+                    if not postings:
+                        del self._postings[term]
+        if keys:
+            self._vocabulary = None
+
+    def replace(self, group, version, documents):
+        """Remplacer les documents d'un groupe ; documents = [(clé, titre, texte, champs)]"""
+        prepared = []
+        for key, title, text, fields in documents:
+            frequencies = Counter(terms(text))
+            for term in terms(title):
+                frequencies[term] += TITLE_WEIGHT
+            positions = _first_positions(text)
+            for term in frequencies:
+                positions.setdefault(term, None)  # terme du titre seulement
+            prepared.append((key, frequencies, _Document(fields, sum(frequencies.values()), text, positions)))
+
+        with self._lock:
+            self._remove_group(group)
+            for key, frequencies, document in prepared:
+                self._documents[key] = document
+                self._total_length += document.length
+                for term, frequency in frequencies.items():
+                    self._postings[term][key] = frequency
+            self._groups[group] = (version, [key for key, _, _ in prepared])
+            self._vocabulary = None
+            self._reindexed += 1
+
+    def remove(self, group):
+        with self._lock:
+            self._remove_group(group)
+
+    def sync(self, versions, build, source_version=None):
+        """Aligner l'index sur `versions` (groupe -> version) ; build(groupe) fournit les documents"""
+        with self._sync_lock:
+            with self._lock:
+                current = {group: version for group, (version, _) in self._groups.items()}
+            for group in current.keys() - versions.keys():
+                self.remove(group)
+            for group, version in versions.items():
+                if current.get(group) != version:
+                    self.replace(group, version, build(group))
+            self.source_version = source_version
+
+    def _expand(self, query_terms):
+        """Termes exacts ; le dernier mot, s'il est inconnu, est complété par préfixe (appelé avec le verrou)"""
+        expanded = [term for term in query_terms if term in self._postings]
+        if query_terms and query_terms[-1] not in self._postings:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self._postings)
+            prefix = query_terms[-1]
+            start = bisect.bisect_left(self._vocabulary, prefix)
+            for term in self._vocabulary[start:start + MAX_PREFIX_TERMS]:
+                if not term.startswith(prefix):
+                    break
+                expanded.append(term)
+        return expanded
+
+    def search(self, query, limit=20, kind=None):
+        """Documents classés par score BM25, avec un extrait autour des termes trouvés"""
+        started = time.perf_counter()
+        query_terms = list(dict.fromkeys(terms(query)))
+        scores = defaultdict(float)
+        matched = defaultdict(list)
+        with self._lock:
+            count = len(self._documents)
+            average_length = self._total_length / count if count else 0
+            for term in self._expand(query_terms):
+                postings = self._postings[term]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, frequency in postings.items():
+                    if kind is not None and key[0] != kind:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._documents[key].length / average_length)
+                    scores[key] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                    matched[key].append(term)
+            top = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+            results = [{
+                **self._documents[key].fields,
+                "score": round(score, 3),
+                "snippet": _snippet(self._documents[key], matched[key])
+            } for key, score in top]
+        took_ms = (time.perf_counter() - started) * 1000
+        self._latency.record(took_ms)
+        return {"query": query, "total": len(scores), "results": results, "took_ms": round(took_ms, 3)}
+
+    def stats(self):
+        """Taille de l'index et latence des recherches"""
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "terms": len(self._postings),
+                "groups": len(self._groups),
+                "reindexed_groups": self._reindexed,
+                "query_ms": self._latency.summary()
+            }
@@ -0,0 +1,290 @@
+"""
+Sessions utilisateur : expiration, index inverse username -> tokens et persistance optionnelle,
+ou tokens signés HMAC sans état partagé (déploiement multi-processus)
+"""
+import base64
+import hashlib
+import heapq
+import hmac
+import json
+import secrets
+import threading
+import time
+
+SESSION_TTL = 7 * 24 * 3600  # une semaine
+SWEEP_INTERVAL = 300  # secondes entre deux purges des sessions expirées
+REVOCATION_REFRESH_INTERVAL = 30  # secondes entre deux relectures des révocations
+
+
+def token_digest(token):
+    """Empreinte du token : seule valeur conservée (mémoire et base)"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class SessionStore:
+    """Sessions par token avec expiration et révocation par utilisateur.
+
+    Les sessions expirées sont refusées dès leur échéance et purgées par lots
+    (au plus une fois par `sweep_interval`) lors des appels suivants.
+    Si `persistence` est fourni (module database), chaque session est aussi
+    écrite en base et rechargée au démarrage : un redémarrage ne force plus
+    tous les clients à se reconnecter.
+    """
+
+    def __init__(self, ttl=SESSION_TTL, sweep_interval=SWEEP_INTERVAL, persistence=None):
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._persistence = persistence
+        self._sessions = {}     # digest -> (username, expires_at)
+        self._by_user = {}      # username -> set(digest)
+        self._expiry_heap = []  # (expires_at, digest)
+        self._lock = threading.Lock()
+        self._next_sweep = time.time() + sweep_interval
+        self._created = 0
+        self._expired = 0
+        self._revoked = 0
+
+        if persistence is not None:
+            self._load()
+
+    def _load(self):
+        now = time.time()
+        self._persistence.purge_expired_sessions(now)
+        for digest, username, expires_at in self._persistence.load_sessions(now):
+            self._add(digest, username, expires_at)
+        print(f"🔐 [SESSIONS] {len(self._sessions)} sessions restaurées depuis SQLite")
+
+    def _add(self, digest, username, expires_at):
+        self._sessions[digest] = (username, expires_at)
+        self._by_user.setdefault(username, set()).add(digest)
+        heapq.heappush(self._expiry_heap, (expires_at, digest))
+
+    def _discard(self, digest):
+        username, _ = self._sessions.pop(digest)
+        tokens = self._by_user.get(username)
+        if tokens is not None:
+            tokens.discard(digest)
+            if not tokens:
+                del self._by_user[username]
+
+    def _maybe_sweep(self, now):
+        """Purger les sessions expirées (appelé avec le verrou)"""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, digest = heapq.heappop(self._expiry_heap)
+            if digest in self._sessions:
+                self._discard(digest)
+                self._expired += 1
+        if self._persistence is not None:
+            self._persistence.purge_expired_sessions(now)
+
+    def create(self, username, is_admin=False):
+        """Ouvrir une session et retourner son token"""
+        token = secrets.token_urlsafe(32)
+        digest = token_digest(token)
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._maybe_sweep(now)
+            self._add(digest, username, expires_at)
+            self._created += 1
+        if self._persistence is not None:
+            self._persistence.save_session(digest, username, now, expires_at)
+        return token
+
+    def get(self, token):
+        """Utilisateur associé au token, ou None (token inconnu ou expiré)"""
+        if not token:
+            return None
+        digest = token_digest(token)
+        now = time.time()
+        with self._lock:
+            self._maybe_sweep(now)
+            session = self._sessions.get(digest)
+            if session is None:
+                return None
+            username, expires_at = session
+            if expires_at <= now:
+                self._discard(digest)
+                self._expired += 1
+                return None
+            return username
+
+    def get_claims(self, token):
+        """Informations de session ; is_admin est inconnu (None) pour un token opaque"""
+        username = self.get(token)
+        if username is None:
+            return None
+        return {"username": username, "is_admin": None}
+
+    def revoke(self, token):
+        """Fermer une session"""
+        digest = token_digest(token)
+        with self._lock:
+            if digest not in self._sessions:
+                return False
+            self._discard(digest)
+            self._revoked += 1
+        if self._persistence is not None:
+            self._persistence.delete_sessions([digest])
+        return True
+
+    def revoke_user(self, username):
+        """Fermer toutes les sessions d'un utilisateur (sans parcourir les autres)"""
+        with self._lock:
+            digests = self._by_user.pop(username, set())
+            for digest in digests:
+                del self._sessions[digest]
+            self._revoked += len(digests)
+        if self._persistence is not None:
+            self._persistence.delete_user_sessions(username)
+        return len(digests)
+
+    def active_count(self):
+        return len(self._sessions)
+
+    def stats(self):
+        """Compteurs des sessions"""
+        with self._lock:
+            return {
+                "mode": "store",
+                "active": len(self._sessions),
+                "users": len(self._by_user),
+                "created": self._created,
+                "expired": self._expired,
+                "revoked": self._revoked,
+                "persistent": self._persistence is not None
+            }
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class SignedSessionStore:
+    """Tokens autoporteurs signés HMAC-SHA256 (username, émission, expiration, admin).
+
+    La vérification ne demande ni état partagé ni accès à la base : un token
+    émis par un processus est accepté par tous ceux qui partagent la clé.
+    Seule une petite liste de révocations (utilisateurs supprimés, déconnexions)
+    est conservée ; elle est partagée via SQLite si `persistence` est fourni
+    et relue au plus toutes les `refresh_interval` secondes.
+    """
+
+    def __init__(self, secret_key, ttl=SESSION_TTL, persistence=None,
+                 refresh_interval=REVOCATION_REFRESH_INTERVAL):
+        self._key = secret_key.encode('utf-8') if isinstance(secret_key, str) else secret_key
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self._persistence = persistence
+        self._revoked_users = {}   # username -> tokens émis avant cette date refusés
+        self._revoked_tokens = {}  # empreinte -> expiration du token révoqué
+        self._lock = threading.Lock()
+        self._next_refresh = 0.0
+        self._issued = 0
+        self._rejected = 0
+
+    def _sign(self, payload):
+        return hmac.new(self._key, payload, hashlib.sha256).digest()
+
+    def create(self, username, is_admin=False):
+        """Émettre un token signé"""
+        now = time.time()
+        claims = {"u": username, "iat": now, "exp": now + self.ttl, "adm": 1 if is_admin else 0}
+        payload = json.dumps(claims, separators=(',', ':')).encode('utf-8')
+        with self._lock:
+            self._issued += 1
+        return f"{_b64encode(payload)}.{_b64encode(self._sign(payload))}"
+
+    def _refresh_revocations(self, now):
+        """Relire les révocations partagées (appelé avec le verrou)"""
+        if self._persistence is None or now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_interval
+        # Une révocation plus vieille que la durée de vie d'un token ne sert plus
+        for username, revoked_at in self._persistence.load_revocations(now - self.ttl):
+            if revoked_at > self._revoked_users.get(username, 0):
+                self._revoked_users[username] = revoked_at
+
+    def get_claims(self, token):
+        """Informations du token s'il est authentique, non expiré et non révoqué"""
+        if not token or token.count('.') != 1:
+            return None
+        payload_part, signature_part = token.split('.')
+        try:
+            payload = _b64decode(payload_part)
+            signature = _b64decode(signature_part)
+        except (ValueError, TypeError):
+            return self._reject()
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return self._reject()
+        claims = json.loads(payload)
+
+        now = time.time()
+        if claims["exp"] <= now:
+            return self._reject()
+        with self._lock:
+            self._refresh_revocations(now)
+            revoked = claims["iat"] <= self._revoked_users.get(claims["u"], 0) or \
+                (bool(self._revoked_tokens) and token_digest(token) in self._revoked_tokens)
+        if revoked:
+            return self._reject()
+        return {"username": claims["u"], "is_admin": bool(claims["adm"])}
+
+    def _reject(self):
+        with self._lock:
+            self._rejected += 1
+        return None
+
+    def get(self, token):
+        """Utilisateur associé au token, ou None"""
+        claims = self.get_claims(token)
+        return claims["username"] if claims else None
+
+    def revoke(self, token):
+        """Refuser un token précis jusqu'à son expiration"""
+        claims = self.get_claims(token)
+        if claims is None:
+            return False
+        payload = json.loads(_b64decode(token.split('.')[0]))
+        now = time.time()
+        with self._lock:
+            self._revoked_tokens[token_digest(token)] = payload["exp"]
+            # Purger les révocations de tokens déjà expirés
+            for digest in [d for d, exp in self._revoked_tokens.items() if exp <= now]:
+                del self._revoked_tokens[digest]
+        return True
+
+    def revoke_user(self, username):
+        """Refuser tous les tokens émis jusqu'ici pour cet utilisateur"""
+        now = time.time()
+        with self._lock:
+            self._revoked_users[username] = now
+            # Les révocations plus vieilles que la durée de vie des tokens sont inutiles
+            for name in [n for n, at in self._revoked_users.items() if at <= now - self.ttl]:
+                del self._revoked_users[name]
+        if self._persistence is not None:
+            self._persistence.save_revocation(username, now)
+        return 1
+
+    def active_count(self):
+        # Les tokens signés ne sont pas suivis : nombre de sessions inconnu
+        return None
+
+    def stats(self):
+        """Compteurs des tokens signés"""
+        with self._lock:
+            return {
+                "mode": "signed",
+                "issued": self._issued,
+                "rejected": self._rejected,
+                "revoked_users": len(self._revoked_users),
+                "revoked_tokens": len(self._revoked_tokens),
+                "persistent": self._persistence is not None
+            }
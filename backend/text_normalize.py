@@ -0,0 +1,57 @@
+"""
+Normalisation de texte en français : accents, casse, espaces, mots vides et racinisation légère
+"""
+import re
+import unicodedata
+
+WORD = re.compile(r'[a-z0-9]+')
+_SPACES = re.compile(r'\s+')
+
+STOPWORDS = frozenset("""
+a au aux avec ce ces cet cette dans de des du elle en est et eux il ils je la le les leur leurs lui
+ma mais me meme mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sont sur
+ta te tes toi ton tu un une vos votre vous y d l n s t c j m
+the of and or to in is are for on with an be by as at it
+""".split())
+
+# Suffixes retirés du plus long au plus court ; la racine garde au moins MIN_STEM lettres
+_SUFFIXES = (
+    'issements', 'issement', 'atrices', 'ateurs', 'ations', 'atrice', 'ateur', 'ation',
+    'ements', 'ement', 'ments', 'ment', 'euses', 'euse', 'eurs', 'eur',
+    'iques', 'ique', 'ismes', 'isme', 'istes', 'iste', 'ables', 'able', 'ites', 'ite',
+    'ees', 'ee', 'es', 'e', 's', 'x',
+)
+MIN_STEM = 3
+
+
+def _fold_char(char):
+    decomposed = unicodedata.normalize('NFKD', char)
+    base = ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    return base if len(base) == 1 else char.lower()
+
+
+def fold(text):
+    """Minuscules sans accents, un caractère par caractère d'origine (positions conservées)"""
+    if text.isascii():
+        return text.lower()
+    return ''.join(_fold_char(char) for char in text)
+
+
+def squash(text):
+    """Forme canonique d'une réponse courte : sans accents, minuscules, espaces réduits"""
+    return _SPACES.sub(' ', fold(text)).strip()
+
+
+def stem(word):
+    """Racine approximative d'un mot déjà replié (pluriels et suffixes courants)"""
+    if word.endswith('aux') and len(word) > 4:
+        return word[:-3] + 'al'
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+def terms(text):
+    """Termes indexables d'un texte : mots repliés, sans mots vides, racinisés"""
+    return [stem(word) for word in WORD.findall(fold(text)) if word not in STOPWORDS]
@@ -28,10 +28,16 @@ export const apiEndpoints = {
   modules: {
     list: `${API_BASE_URL}/api/modules`,
     detail: (id) => `${API_BASE_URL}/api/module/${id}`,
+    full: (id) => `${API_BASE_URL}/api/module/${id}?full=1`,
+    lesson: (id, lessonId) => `${API_BASE_URL}/api/module/${id}/lesson/${lessonId}`,
   },
   quests: {
     list: `${API_BASE_URL}/api/quests`,
     detail: (id) => `${API_BASE_URL}/api/quest/${id}`,
+    grade: (id) => `${API_BASE_URL}/api/quest/${id}/grade`,
+  },
+  search: {
+    query: (q) => `${API_BASE_URL}/api/search?q=${encodeURIComponent(q)}`,
   },
   user: {
     progress: `${API_BASE_URL}/api/user/progress`,
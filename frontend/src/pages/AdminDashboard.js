@@ -122,23 +122,31 @@ function AdminDashboard() {
       console.log('🔍 [ADMIN] Récupération des utilisateurs...');
       console.log('🔑 [ADMIN] Token:', token ? 'Présent' : 'Absent');
       
-      const response = await fetch('http://localhost:5000/api/admin/users', {
-        headers: {
-          'Authorization': `Bearer ${token}`
+      // La liste est paginée : suivre le curseur jusqu'à la dernière page
+      const allUsers = [];
+      let cursor = 0;
+      while (cursor !== null) {
+        const response = await fetch(`http://localhost:5000/api/admin/users?limit=500&after=${cursor}`, {
+          headers: {
+            'Authorization': `Bearer ${token}`
+          }
+        });
+        
+        console.log('📡 [ADMIN] Réponse status:', response.status);
+        
+        if (!response.ok) {
+          const error = await response.json();
+          console.error('❌ [ADMIN] Erreur réponse:', error);
+          return;
         }
-      });
-      
-      console.log('📡 [ADMIN] Réponse status:', response.status);
-      
-      if (response.ok) {
+        
         const data = await response.json();
-        console.log('✅ [ADMIN] Données reçues:', data);
-        console.log('👥 [ADMIN] Nombre d\'utilisateurs:', data.users?.length || 0);
-        setUsers(data.users || []);
-      } else {
-        const error = await response.json();
-        console.error('❌ [ADMIN] Erreur réponse:', error);
+        allUsers.push(...(data.users || []));
+        cursor = data.next_cursor ?? null;
       }
+      
+      console.log('👥 [ADMIN] Nombre d\'utilisateurs:', allUsers.length);
+      setUsers(allUsers);
     } catch (error) {
       console.error('❌ [ADMIN] Erreur fetch:', error);
     }
@@ -290,6 +298,10 @@ function AdminDashboard() {
     }
   };
 
+  // Identifiant libre : le plus grand + 1 (la longueur réutiliserait un id après une suppression)
+  const nextLessonId = (lessons) =>
+    lessons.reduce((max, lesson) => Math.max(max, Number(lesson.id) || 0), 0) + 1;
+
   const addLesson = () => {
     if (currentLesson.title) {
       // Construire le contenu à partir des sections
@@ -312,7 +324,7 @@ function AdminDashboard() {
       }
       
       const lessonToAdd = {
-        id: moduleForm.lessons.length + 1,
+        id: nextLessonId(moduleForm.lessons),
         title: currentLesson.title,
         content: fullContent.trim()
       };
@@ -323,7 +335,7 @@ function AdminDashboard() {
       });
       
       setCurrentLesson({ 
-        id: moduleForm.lessons.length + 2, 
+        id: nextLessonId(moduleForm.lessons) + 1,
         title: '', 
         content: '',
         introduction: '',
@@ -388,12 +400,24 @@ function AdminDashboard() {
     });
   };
 
-  const editModule = (module) => {
+  const editModule = async (module) => {
+    // /api/modules ne contient pas les leçons : charger le module complet, sinon
+    // l'enregistrement renverrait une liste vide et supprimerait toutes les leçons
+    let lessons;
+    try {
+      const response = await fetch(`http://localhost:5000/api/module/${module.id}?full=1`);
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      lessons = (await response.json()).lessons || [];
+    } catch (error) {
+      console.error('Erreur lors du chargement du module:', error);
+      alert('❌ Impossible de charger les leçons du module');
+      return;
+    }
     setModuleForm({
       ...module,
-      lessons: module.lessons || []
+      lessons
     });
-    setCurrentLesson({ id: (module.lessons || []).length + 1, title: '', content: '', introduction: '', fundamentals: '', advanced: '', practice: '' });
+    setCurrentLesson({ id: nextLessonId(lessons), title: '', content: '', introduction: '', fundamentals: '', advanced: '', practice: '' });
     setEditingModule(module.id);
     setShowModuleForm(true);
   };
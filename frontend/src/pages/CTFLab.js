@@ -185,10 +185,12 @@ function CTFLab() {
 
     try {
       // Call backend API to start Docker container
+      const token = localStorage.getItem('auth_token');
       const response = await fetch('http://localhost:5000/api/start-lab', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          ...(token ? { 'Authorization': `Bearer ${token}` } : {})
         },
         body: JSON.stringify({
           username: user?.username || 'guest',
@@ -240,10 +242,12 @@ function CTFLab() {
 
     try {
       // Call backend API to validate flag
+      const token = localStorage.getItem('auth_token');
       const response = await fetch('http://localhost:5000/api/submit-flag', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          ...(token ? { 'Authorization': `Bearer ${token}` } : {})
         },
         body: JSON.stringify({
           flag: flag,
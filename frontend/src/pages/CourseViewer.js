@@ -20,7 +20,7 @@ function CourseViewer() {
   const fetchModule = async () => {
     try {
       setLoading(true);
-      const response = await fetch(`http://localhost:5000/api/module/${moduleId}`);
+      const response = await fetch(`http://localhost:5000/api/module/${moduleId}?full=1`);
       
       if (response.ok) {
         const data = await response.json();
@@ -21,12 +21,20 @@ function NewCourseViewer() {
   const fetchModule = async () => {
     try {
       setLoading(true);
+      // Plan du module (sans le contenu), puis seulement la leçon affichée
       const response = await fetch(`http://127.0.0.1:5000/api/module/${moduleId}`);
       
       if (response.ok) {
         const data = await response.json();
+        let lesson = { content: "", html: null, sections: [] };
+        if (data.lessons.length > 0) {
+          const lessonResponse = await fetch(`http://127.0.0.1:5000/api/module/${moduleId}/lesson/${data.lessons[0].id}`);
+          if (lessonResponse.ok) {
+            lesson = await lessonResponse.json();
+          }
+        }
         // Diviser le contenu en 4 pages
-        const pages = createPages(data);
+        const pages = createPages(lesson);
         setModule({ ...data, pages });
         setProgress((1 / pages.length) * 100); // Calculer le progrès en fonction du nombre de pages
       } else {
@@ -40,12 +48,17 @@ function NewCourseViewer() {
     }
   };
 
-  const createPages = (moduleData) => {
-    const content = moduleData.lessons[0].content;
-    
+  const createPages = (lesson) => {
+    const content = lesson.content;
     // Diviser le contenu par sections (chaque section commence par ##)
     const sections = content.split(/(?=## )/g).filter(s => s.trim());
     
+    // HTML déjà rendu par le serveur pour la section contenant cet emoji
+    const sectionHtml = (emoji) => {
+      const rendered = (lesson.sections || []).find(s => s.title.includes(emoji) || s.html.includes(emoji));
+      return rendered ? rendered.html : null;
+    };
+    
     console.log('📚 Sections détectées:', sections);
     
     // Créer les pages pour chaque section
@@ -57,6 +70,7 @@ function NewCourseViewer() {
       pages.push({
         title: 'Introduction',
         content: introSection,
+        html: sectionHtml('📖'),
         icon: "📖"
       });
     }
@@ -67,6 +81,7 @@ function NewCourseViewer() {
       pages.push({
         title: 'Concepts fondamentaux',
         content: fundamentalsSection,
+        html: sectionHtml('🧠'),
         icon: "🧠"
       });
     }
@@ -77,6 +92,7 @@ function NewCourseViewer() {
       pages.push({
         title: 'Techniques avancées',
         content: advancedSection,
+        html: sectionHtml('⚡'),
         icon: "⚡"
       });
     }
@@ -87,6 +103,7 @@ function NewCourseViewer() {
       pages.push({
         title: 'Pratique & Résumé',
         content: practiceSection,
+        html: sectionHtml('🎯'),
         icon: "🎯"
       });
     }
@@ -97,6 +114,7 @@ function NewCourseViewer() {
         {
           title: 'Introduction',
           content: content,
+          html: lesson.html,
           icon: "📖"
         },
         {
@@ -253,9 +271,13 @@ function NewCourseViewer() {
           </div>
 
           <div className="content-body">
-            <div className="markdown-content">
-              {formatContent(currentPageData.content)}
-            </div>
+            {currentPageData.html ? (
+              <div className="markdown-content" dangerouslySetInnerHTML={{__html: currentPageData.html}} />
+            ) : (
+              <div className="markdown-content">
+                {formatContent(currentPageData.content)}
+              </div>
+            )}
           </div>
 
           <footer className="content-footer">
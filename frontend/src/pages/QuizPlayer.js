@@ -15,6 +15,7 @@ function QuizPlayer() {
   const [showResult, setShowResult] = useState(false);
   const [showExplanation, setShowExplanation] = useState(false);
   const [isCorrect, setIsCorrect] = useState(false);
+  const [expectedAnswer, setExpectedAnswer] = useState("");
   const [loading, setLoading] = useState(true);
   const inputRef = useRef();
 
@@ -66,18 +67,43 @@ function QuizPlayer() {
     });
   };
 
-  const handleSubmit = () => {
+  // Correction par le serveur ; vérification locale si le serveur est injoignable.
+  // Fautes de frappe tolérées seulement pour les questions qui fixent une "tolerance".
+  const gradeAnswer = async (question) => {
+    try {
+      const response = await fetch(`http://localhost:5000/api/quest/${moduleId}/grade`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          answers: [{ question_id: question.id, answer: userAnswer }],
+          fuzzy: Number.isInteger(question.tolerance) && question.tolerance > 0
+        })
+      });
+      if (response.ok) {
+        const result = (await response.json()).results[0];
+        if (result && !result.error) {
+          return { correct: result.correct, expected: result.expected };
+        }
+      }
+    } catch (error) {
+      console.error("Erreur de correction:", error);
+    }
+    return { correct: checkAnswer(userAnswer, question.answer), expected: question.answer.split("|")[0] };
+  };
+
+  const handleSubmit = async () => {
     const question = questions[currentQuestion];
-    const correct = checkAnswer(userAnswer, question.answer);
+    const { correct, expected } = await gradeAnswer(question);
     
     setIsCorrect(correct);
+    setExpectedAnswer(expected);
     setShowExplanation(true);
     
     const newAnswer = {
       questionId: question.id,
       question: question.question,
       userAnswer,
-      correctAnswer: question.answer.split("|")[0],
+      correctAnswer: expected,
       isCorrect: correct,
       explanation: question.explanation
     };
@@ -270,7 +296,7 @@ function QuizPlayer() {
                 </div>
                 {!isCorrect && (
                   <div className="correct-answer">
-                    Réponse attendue: {question.answer.split("|")[0]}
+                    Réponse attendue: {expectedAnswer}
                   </div>
                 )}
                 <div className="explanation">